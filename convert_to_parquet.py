@@ -9,6 +9,13 @@ This script converts the large CSV file to Parquet format, which:
 
 Usage:
     python convert_to_parquet.py [--input battles.csv] [--output battles.parquet]
+                                 [--compression zstd] [--row-group-size 1048576]
+                                 [--force]
+
+Output is ZSTD-compressed with dictionary encoding by default, which suits the
+many repeated card IDs, arena names and tags. Each row group carries min/max
+statistics, so downstream read_parquet() filters skip row groups that cannot
+match without decoding them.
 
 After conversion, update your notebooks to use:
     con.execute("CREATE VIEW battles AS SELECT * FROM read_parquet('battles.parquet')")
@@ -19,8 +26,30 @@ import os
 import sys
 import time
 from pathlib import Path
+from typing import Dict
 
 import duckdb
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+# Add src/ to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from duckdb_utils import estimate_csv_rows, tuned_connection
+
+
+DEFAULT_COMPRESSION = 'zstd'
+ZSTD_COMPRESSION_LEVEL = 3
+DEFAULT_ROW_GROUP_SIZE = 1_048_576
+DICTIONARY_PAGE_SIZE_LIMIT = 2 * 1024 ** 2
+
+# ID columns whose values are bounded well below 2**31 (card IDs are
+# 26000000-28000020, arena/game mode IDs < 80000000). Stored as INT32 instead
+# of the inferred INT64, which halves the bytes every later scan reads.
+INT32_ID_COLUMNS = ('arena.id', 'gameMode.id') + tuple(
+    f'{side}.card{i}.id' for side in ('winner', 'loser') for i in range(1, 9)
+)
 
 
 def get_file_size_mb(filepath: str) -> float:
@@ -33,20 +62,173 @@ def get_file_size_gb(filepath: str) -> float:
     return os.path.getsize(filepath) / (1024 ** 3)
 
 
+def write_parquet_with_arrow(
+    csv_path: str,
+    parquet_path: str,
+    compression: str = DEFAULT_COMPRESSION,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    block_size: int = 64 << 20
+) -> None:
+    """
+    Stream a CSV into Parquet with pyarrow, one record batch at a time.
+
+    Batches are buffered until ``row_group_size`` rows have accumulated
+    and then flushed as a single row group, so memory stays bounded and
+    write cost grows linearly with file size.
+
+    Args:
+        csv_path: Path to input CSV file
+        parquet_path: Path to output Parquet file
+        compression: Parquet compression codec
+        row_group_size: Rows per row group
+        block_size: CSV bytes parsed per record batch
+
+    Raises:
+        pyarrow.ArrowInvalid: If a later block contradicts the types
+            inferred from the first block
+    """
+    reader = pv.open_csv(
+        csv_path,
+        read_options=pv.ReadOptions(block_size=block_size),
+        # Skip malformed rows, same as DuckDB's IGNORE_ERRORS
+        parse_options=pv.ParseOptions(invalid_row_handler=lambda row: 'skip'),
+        # Columns missing from the file are ignored
+        convert_options=pv.ConvertOptions(
+            column_types={col: pa.int32() for col in INT32_ID_COLUMNS}
+        )
+    )
+    writer = pq.ParquetWriter(
+        parquet_path,
+        reader.schema,
+        compression=compression,
+        compression_level=ZSTD_COMPRESSION_LEVEL if compression == 'zstd' else None,
+        use_dictionary=True,
+        dictionary_pagesize_limit=DICTIONARY_PAGE_SIZE_LIMIT,
+        data_page_size=1 << 20,
+        write_batch_size=8192
+    )
+
+    try:
+        pending = []
+        pending_rows = 0
+        for batch in reader:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows >= row_group_size:
+                # Write whole row groups; carry the remainder into the next one
+                table = pa.Table.from_batches(pending, schema=reader.schema)
+                n_full = (table.num_rows // row_group_size) * row_group_size
+                writer.write_table(table.slice(0, n_full), row_group_size=row_group_size)
+                rest = table.slice(n_full)
+                pending = rest.to_batches()
+                pending_rows = rest.num_rows
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending, schema=reader.schema))
+    finally:
+        writer.close()
+
+
+def parquet_copy_options(
+    compression: str = DEFAULT_COMPRESSION,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE
+) -> str:
+    """Build the option list for DuckDB's ``COPY ... TO`` Parquet writer."""
+    codec = 'uncompressed' if compression == 'none' else compression
+    options = ["FORMAT PARQUET", f"COMPRESSION '{codec}'"]
+    if compression == 'zstd':
+        options.append(f"COMPRESSION_LEVEL {ZSTD_COMPRESSION_LEVEL}")
+    # DuckDB dictionary-encodes by default; its DICTIONARY_SIZE_LIMIT is an
+    # entry count (default row_group_size / 20), ample for card IDs
+    options.append(f"ROW_GROUP_SIZE {row_group_size}")
+    return ', '.join(options)
+
+
+def sniff_csv_columns(
+    con: duckdb.DuckDBPyConnection,
+    csv_path_escaped: str,
+    sample_size: int = 200_000
+) -> Dict[str, str]:
+    """
+    Detect column names and types from a bounded sample of the CSV.
+
+    Returns:
+        Ordered {column_name: duckdb_type} mapping
+    """
+    columns = con.execute(f"""
+        SELECT Columns FROM sniff_csv('{csv_path_escaped}', sample_size={sample_size})
+    """).fetchone()[0]
+    return {col['name']: col['type'] for col in columns}
+
+
+def copy_with_duckdb(
+    con: duckdb.DuckDBPyConnection,
+    csv_path_escaped: str,
+    parquet_path_escaped: str,
+    compression: str = DEFAULT_COMPRESSION,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE
+) -> None:
+    """
+    Convert CSV to Parquet with DuckDB's COPY.
+
+    Types are sniffed once from a sample, with ``INT32_ID_COLUMNS`` narrowed
+    to INTEGER, and the CSV is then read in a single typed pass. Rows that
+    do not fit the sniffed types are kept out of the output and recorded in
+    the ``rejects`` temp table instead of forcing a second, all-VARCHAR pass
+    over the whole file.
+    """
+    copy_options = parquet_copy_options(compression, row_group_size)
+
+    print("  Sniffing column types from a 200,000-row sample...")
+    columns = sniff_csv_columns(con, csv_path_escaped)
+    columns.update({col: 'INTEGER' for col in INT32_ID_COLUMNS if col in columns})
+    columns_sql = ', '.join(
+        f"""'{name.replace("'", "''")}': '{col_type}'""" for name, col_type in columns.items()
+    )
+
+    print(f"  Converting with {len(columns)} typed columns...")
+    con.execute(f"""
+        COPY (
+            SELECT * FROM read_csv('{csv_path_escaped}',
+                header=true,
+                columns={{{columns_sql}}},
+                store_rejects=true,
+                rejects_table='rejects',
+                rejects_limit=0
+            )
+        ) 
+        TO '{parquet_path_escaped}' ({copy_options})
+    """)
+
+    rejected = con.execute("SELECT COUNT(*) FROM rejects").fetchone()[0]
+    if rejected:
+        print(f"  [WARNING] {rejected:,} rows did not match the sniffed types and were skipped")
+        print(con.sql("""
+            SELECT line, column_name, error_type FROM rejects LIMIT 5
+        """).df())
+
+
 def convert_csv_to_parquet(
     csv_path: str,
     parquet_path: str,
-    chunk_size: int = 1_000_000
+    chunk_size: int = 1_000_000,
+    compression: str = DEFAULT_COMPRESSION,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    force: bool = False
 ) -> None:
     """
-    Convert CSV to Parquet using DuckDB.
+    Convert CSV to Parquet using pyarrow streaming (DuckDB as fallback).
     
-    Processes in chunks to handle large files efficiently.
+    Processes record batches to handle large files efficiently. Output is
+    written to ``<parquet_path>.tmp`` and renamed into place once complete,
+    so readers never see a partial file and a crash leaves the old one intact.
     
     Args:
         csv_path: Path to input CSV file
         parquet_path: Path to output Parquet file
         chunk_size: Number of rows to process per chunk
+        compression: Parquet compression codec ('zstd', 'snappy', ...)
+        row_group_size: Rows per Parquet row group
+        force: Overwrite ``parquet_path`` if it already exists
     """
     print("=" * 70)
     print("CSV to Parquet Converter")
@@ -58,11 +240,9 @@ def convert_csv_to_parquet(
         sys.exit(1)
     
     # Check if output already exists
-    if os.path.exists(parquet_path):
-        response = input(f"[WARNING] {parquet_path} already exists. Overwrite? (y/n): ")
-        if response.lower() != 'y':
-            print("Cancelled.")
-            return
+    if os.path.exists(parquet_path) and not force:
+        print(f"[WARNING] {parquet_path} already exists. Use --force to overwrite.")
+        return
     
     # Get input file size
     csv_size_gb = get_file_size_gb(csv_path)
@@ -71,22 +251,19 @@ def convert_csv_to_parquet(
     
     # Create DuckDB connection
     print("\nConnecting to DuckDB...")
-    con = duckdb.connect()
+    con = tuned_connection()
     
     # Set encoding to UTF-8 for output
-    import sys
     if sys.stdout.encoding != 'utf-8':
         import io
         sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     
-    # Get row count (for progress tracking)
-    print("Counting rows in CSV...")
+    # Estimate row count from file size (for progress tracking only).
+    # The exact count is read from the Parquet footer after conversion,
+    # so the CSV is only parsed once.
     csv_path_escaped = csv_path.replace("\\", "/").replace("'", "''")
-    
-    # Count rows (this will be approximate but fast)
-    print("  Counting (this may take a minute)...")
-    row_count = con.sql(f"SELECT COUNT(*) as cnt FROM read_csv_auto('{csv_path_escaped}', SAMPLE_SIZE=-1, IGNORE_ERRORS=true)").df()['cnt'].iloc[0]
-    print(f"  Total rows: {row_count:,}")
+    estimated_rows = estimate_csv_rows(csv_path)
+    print(f"  Estimated rows: ~{estimated_rows:,}")
     
     # Convert to Parquet
     print(f"\nConverting to Parquet...")
@@ -95,39 +272,23 @@ def convert_csv_to_parquet(
     
     start_time = time.time()
     
-    # Use DuckDB's COPY command directly - this is the most efficient
-    # DuckDB will handle type inference and conversion automatically
+    # Stream through pyarrow (scales linearly on multi-GB files); fall back
+    # to DuckDB's COPY if Arrow's block-wise type inference hits a conflict
+    tmp_path = f"{parquet_path}.tmp"
+    tmp_path_escaped = tmp_path.replace("\\", "/").replace("'", "''")
     parquet_path_escaped = parquet_path.replace("\\", "/").replace("'", "''")
     
     try:
-        # Try with auto type inference first
         try:
-            print("  Attempting conversion with auto type inference...")
-            con.execute(f"""
-                COPY (
-                    SELECT * FROM read_csv_auto('{csv_path_escaped}',
-                        SAMPLE_SIZE=200000,
-                        IGNORE_ERRORS=true,
-                        hive_partitioning=0
-                    )
-                ) 
-                TO '{parquet_path_escaped}' (FORMAT PARQUET, COMPRESSION 'snappy')
-            """)
-        except Exception as type_error:
-            # If type inference fails, use ALL_VARCHAR approach
-            print("  Auto type inference failed (type inconsistencies detected).")
-            print("  Using ALL_VARCHAR mode (slower but handles all type conflicts)...")
-            con.execute(f"""
-                COPY (
-                    SELECT * FROM read_csv('{csv_path_escaped}',
-                        SAMPLE_SIZE=-1,
-                        IGNORE_ERRORS=true,
-                        ALL_VARCHAR=true,
-                        header=true
-                    )
-                ) 
-                TO '{parquet_path_escaped}' (FORMAT PARQUET, COMPRESSION 'snappy')
-            """)
+            print("  Streaming CSV record batches with pyarrow...")
+            write_parquet_with_arrow(csv_path, tmp_path, compression, row_group_size)
+        except pa.ArrowInvalid as arrow_error:
+            print(f"  Arrow streaming failed: {arrow_error}")
+            print("  Falling back to DuckDB COPY...")
+            copy_with_duckdb(
+                con, csv_path_escaped, tmp_path_escaped, compression, row_group_size
+            )
+        os.replace(tmp_path, parquet_path)
         
         elapsed = time.time() - start_time
         
@@ -143,27 +304,23 @@ def convert_csv_to_parquet(
         
         # Verify the Parquet file
         print(f"\nVerifying Parquet file...")
-        con.execute(f"""
-            CREATE TEMP VIEW temp_parquet AS
-            SELECT * FROM read_parquet('{parquet_path_escaped}')
-        """)
-        parquet_row_count = con.sql("SELECT COUNT(*) as cnt FROM temp_parquet").df()['cnt'].iloc[0]
-        
-        if parquet_row_count == row_count:
-            print(f"  [OK] Row count matches: {parquet_row_count:,}")
-        else:
-            print(f"  [WARNING] Row count mismatch!")
-            print(f"    CSV: {row_count:,}, Parquet: {parquet_row_count:,}")
+        # Row count comes from the footer metadata; no data pages are read
+        parquet_row_count = con.execute(f"""
+            SELECT SUM(num_rows) FROM parquet_file_metadata('{parquet_path_escaped}')
+        """).fetchone()[0]
+        print(f"  [OK] Rows written: {parquet_row_count:,} (estimated ~{estimated_rows:,})")
         
         # Show sample
         print(f"\nSample from Parquet file:")
-        sample = con.sql("SELECT * FROM temp_parquet LIMIT 5").df()
+        sample = con.sql(f"SELECT * FROM read_parquet('{parquet_path_escaped}') LIMIT 5").df()
         print(sample.head())
         
     except Exception as e:
         print(f"\n[ERROR] Error during conversion: {e}")
         import traceback
         traceback.print_exc()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         sys.exit(1)
     finally:
         con.close()
@@ -174,7 +331,7 @@ def convert_csv_to_parquet(
     print("\n1. Update your notebooks to use Parquet:")
     print("   OLD: create_battles_view(con, 'battles.csv')")
     print("   NEW: con.execute(\"CREATE VIEW battles AS SELECT * FROM read_parquet('battles.parquet')\")")
-    print("\n2. Or update duckdb_utils.py to support Parquet files")
+    print("\n2. Or keep using create_battles_view(con, 'battles.csv'); it picks up battles.parquet")
     print("\n3. Enjoy 10-50x faster queries! 🚀")
 
 
@@ -200,6 +357,24 @@ def main():
         default=1_000_000,
         help='Rows per chunk (default: 1,000,000)'
     )
+    parser.add_argument(
+        '--compression',
+        type=str,
+        default=DEFAULT_COMPRESSION,
+        choices=['zstd', 'snappy', 'gzip', 'brotli', 'lz4', 'none'],
+        help=f'Parquet compression codec (default: {DEFAULT_COMPRESSION})'
+    )
+    parser.add_argument(
+        '--row-group-size',
+        type=int,
+        default=DEFAULT_ROW_GROUP_SIZE,
+        help=f'Rows per Parquet row group (default: {DEFAULT_ROW_GROUP_SIZE:,})'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Overwrite the output file if it already exists'
+    )
     
     args = parser.parse_args()
     
@@ -223,7 +398,10 @@ def main():
     convert_csv_to_parquet(
         str(csv_path),
         str(parquet_path),
-        args.chunk_size
+        args.chunk_size,
+        args.compression,
+        args.row_group_size,
+        args.force
     )
 
 
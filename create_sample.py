@@ -2,7 +2,7 @@
 """
 create_sample.py
 
-Generate a stratified sample of the battles dataset (Parquet or CSV) for faster iteration.
+Generate a sample of the battles dataset (Parquet or CSV) for faster iteration.
 
 Usage:
     python create_sample.py [--pct PERCENTAGE] [--stratify COLUMN]
@@ -11,22 +11,86 @@ Examples:
     python create_sample.py                          # 10% sample
     python create_sample.py --pct 15                 # 15% sample
     python create_sample.py --stratify "arena.id"    # Stratify by arena
+    python create_sample.py --row-level              # Representative row-level sample
+
+For Parquet input without --stratify or --row-level, whole row groups are
+sampled using the footer metadata, so unselected row groups are never read or
+decoded. This is a CLUSTER sample: each row group is a contiguous, time-ordered
+block of battles, so the sample is fast but not representative of the whole
+dataset. Use --row-level (random rows) or --stratify (stratified rows) when the
+analysis needs a representative sample. The row-group path is also skipped
+automatically when the file's row groups are too large for the requested
+percentage (see sample_row_groups).
 """
 
 import argparse
 import os
 import sys
 import duckdb
+import numpy as np
+import pyarrow.parquet as pq
 
 # Add src/ to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from duckdb_utils import get_connection, create_battles_view, create_sample
+from duckdb_utils import get_connection, create_battles_view, create_sample, save_to_parquet
+
+# A cluster sample needs at least this many row groups to not be too lumpy
+MIN_SAMPLED_ROW_GROUPS = 5
+# Whole groups can only hit the requested row count to within half a group;
+# tolerate at most this relative deviation from it
+MAX_SAMPLE_SIZE_ERROR = 0.10
+
+
+def sample_row_groups(parquet_path: str, sample_pct: float, seed: int = None):
+    """
+    Sample whole Parquet row groups (cluster sampling).
+
+    Picks random row groups until about ``sample_pct`` percent of the rows
+    are covered and reads only those; the rest of the file is never decoded.
+    Row groups are contiguous, time-ordered blocks, so the result is a
+    cluster sample, not a representative one.
+
+    Whether the file is fine-grained enough is decided from its footer: the
+    total row count and the largest row group size. The sample must span at
+    least MIN_SAMPLED_ROW_GROUPS groups, and half a group (the rounding error
+    of whole groups) must be within MAX_SAMPLE_SIZE_ERROR of the target rows.
+
+    Returns:
+        pandas DataFrame with the sampled rows, or None if the file's row
+        groups are too large for the requested percentage
+    """
+    pf = pq.ParquetFile(parquet_path)
+    meta = pf.metadata
+    n_groups = meta.num_row_groups
+    if n_groups == 0:
+        return None
+    target_rows = meta.num_rows * sample_pct / 100.0
+    rows_per_group = max(meta.row_group(i).num_rows for i in range(n_groups))
+    n_pick = round(target_rows / rows_per_group) if rows_per_group else 0
+
+    if n_pick < MIN_SAMPLED_ROW_GROUPS or n_pick >= n_groups:
+        print(f"Sample would span {n_pick} of {n_groups} row groups "
+              f"({rows_per_group:,} rows each)")
+        return None
+    if rows_per_group / 2 > MAX_SAMPLE_SIZE_ERROR * target_rows:
+        print(f"Row groups of {rows_per_group:,} rows are too coarse for a "
+              f"{target_rows:,.0f}-row sample")
+        return None
+
+    rng = np.random.default_rng(seed)
+    chosen = sorted(rng.choice(n_groups, size=n_pick, replace=False).tolist())
+    print(f"Reading {n_pick} of {n_groups} row groups...")
+    return pf.read_row_groups(chosen).to_pandas()
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description='Create a sample of battles dataset (Parquet or CSV) for faster analysis'
+        description=(
+            'Create a sample of battles dataset (Parquet or CSV) for faster analysis. '
+            'Parquet input is cluster-sampled by whole row groups (fast, but contiguous '
+            'time-ordered blocks, not representative) unless --row-level or --stratify is given.'
+        )
     )
     parser.add_argument(
         '--pct',
@@ -52,6 +116,12 @@ def main():
         default=None,
         help='Path to battles.parquet or battles.csv (default: auto-detect battles.parquet)'
     )
+    parser.add_argument(
+        '--row-level',
+        action='store_true',
+        help=('Sample individual random rows even for Parquet input: a representative '
+              'sample instead of the row-group cluster sample (reads the whole file)')
+    )
 
     args = parser.parse_args()
 
@@ -82,23 +152,34 @@ def main():
     if args.stratify:
         print(f"Stratifying by: {args.stratify}")
 
-    # Create connection
-    print("\nConnecting to DuckDB...")
-    con = get_connection()
-
-    # Create view (automatically uses Parquet if available)
-    print("Creating view over dataset...")
-    create_battles_view(con, args.input)
-
-    # Create sample
-    print(f"\nGenerating {args.pct}% sample...")
-    sample_df = create_sample(
-        con,
-        view_name='battles',
-        sample_pct=args.pct,
-        output_path=args.output,
-        stratify_by=args.stratify
-    )
+    # Parquet input: sample whole row groups straight from the footer metadata
+    sample_df = None
+    if args.input.endswith('.parquet') and not args.stratify and not args.row_level:
+        print(f"\nGenerating {args.pct}% row-group (cluster) sample...")
+        sample_df = sample_row_groups(args.input, args.pct)
+        if sample_df is None:
+            print("Row groups too coarse for a cluster sample, sampling rows instead")
+        else:
+            save_to_parquet(sample_df, args.output)
+
+    if sample_df is None:
+        # Create connection
+        print("\nConnecting to DuckDB...")
+        con = get_connection()
+
+        # Create view (automatically uses Parquet if available)
+        print("Creating view over dataset...")
+        create_battles_view(con, args.input)
+
+        # Create sample
+        print(f"\nGenerating {args.pct}% sample...")
+        sample_df = create_sample(
+            con,
+            view_name='battles',
+            sample_pct=args.pct,
+            output_path=args.output,
+            stratify_by=args.stratify
+        )
 
     print(f"\n✓ Sample created successfully!")
     print(f"  - Rows: {len(sample_df):,}")
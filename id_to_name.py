@@ -11,8 +11,8 @@ Usage:
 
 The script will:
     - Read cards.json from Datasets/cards.json
-    - Process battles.csv from Datasets/battles.csv
-    - Create a new file Datasets/battles_with_names.csv with added name columns
+    - Process Datasets/battles.parquet if it exists, otherwise Datasets/battles.csv
+    - Create a new file Datasets/battles_with_names.parquet with added name columns
     - Preserve all original columns and add new *_name columns
 
 Behavior:
@@ -20,37 +20,63 @@ Behavior:
     - Creates new *_name columns rather than overwriting originals.
     - Handles numeric ID columns and string columns containing ID lists.
     - Uses DuckDB for efficient processing of large CSV files.
+    - Writes ZSTD-compressed, dictionary-encoded Parquet; the repetitive
+      *_name columns shrink to a small dictionary per row group. A Parquet copy
+      (see convert_to_parquet.py) is scanned column-wise instead of re-parsing
+      every field of every CSV row.
 """
 
 import os
 import json
+import queue
 import re
-from typing import Dict, List, Tuple
-import duckdb
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from pathlib import Path
 
+# Add src/ to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from duckdb_utils import tuned_connection
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads  # orjson is optional; stdlib parser otherwise
+
 
 def get_project_paths():
     """Get absolute paths for project files."""
     script_dir = Path(__file__).parent.absolute()
     cards_path = script_dir / 'Datasets' / 'cards.json'
     battles_path = script_dir / 'Datasets' / 'battles.csv'
-    output_path = script_dir / 'Datasets' / 'battles_with_names.csv'
+    battles_parquet_path = script_dir / 'Datasets' / 'battles.parquet'
+    output_path = script_dir / 'Datasets' / 'battles_with_names.parquet'
     
     # Convert to absolute paths and normalize for cross-platform compatibility
     return {
         'cards': str(cards_path.resolve()),
         'battles': str(battles_path.resolve()),
+        'battles_parquet': str(battles_parquet_path.resolve()),
         'output': str(output_path.resolve())
     }
 
 
-def load_id_to_name(cards_path: str) -> Dict[int, str]:
-    """Load card ID to name mapping from cards.json."""
-    with open(cards_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+@lru_cache(maxsize=8)
+def _parse_cards_json(cards_path: str, mtime_ns: int) -> Dict[int, str]:
+    """Parse cards.json once per (path, mtime); edits to the file invalidate the cache."""
+    with open(cards_path, "rb") as f:
+        data = _json_loads(f.read())
     
     # Accept either a list of card dicts or {"items": [...]}
     items = data.get("items") if isinstance(data, dict) and "items" in data else data
@@ -67,29 +93,65 @@ def load_id_to_name(cards_path: str) -> Dict[int, str]:
     if not id_to_name:
         raise RuntimeError("No {id,name} pairs found in cards.json")
     
+    return id_to_name
+
+
+def load_id_to_name(cards_path: str) -> Dict[int, str]:
+    """
+    Load card ID to name mapping from cards.json.
+
+    Parsed with orjson when installed. The mapping is memoized per process,
+    so repeated calls return the same dict; treat it as read-only.
+    """
+    id_to_name = _parse_cards_json(cards_path, os.stat(cards_path).st_mtime_ns)
     print(f"✓ Loaded {len(id_to_name)} card mappings from cards.json")
     return id_to_name
 
 
+def build_id_lut(id_to_name: Dict[int, str]) -> Tuple[np.ndarray, int]:
+    """
+    Build a dense NumPy lookup table of card names.
+
+    Card IDs are clustered (26000000-28000020), so the table is indexed by
+    ``card_id - offset`` rather than by the raw ID. Slots without a card are
+    None. A whole column resolves with one fancy-indexing call:
+    ``lut[ids - offset]``.
+
+    Returns:
+        (lut, offset) where ``lut[card_id - offset]`` is the card name
+    """
+    offset = min(id_to_name)
+    lut = np.full(max(id_to_name) - offset + 1, None, dtype=object)
+    for cid, name in id_to_name.items():
+        lut[cid - offset] = name
+    return lut, offset
+
+
 DELIMS = [",", ";", "|", " "]
 
+# Every delimiter and list bracket maps to a space, so one str.translate plus
+# str.split tokenizes a cell in a single C-level pass (no regex per cell)
+_DELIM_TABLE = str.maketrans({d: " " for d in DELIMS + ["[", "]"]})
+_INT_RE = re.compile(r"-?\d+")
+
+
+def is_int_token(tok: str) -> bool:
+    """Return True if tok is an optionally negative decimal integer."""
+    digits = tok[1:] if tok.startswith("-") else tok
+    return digits.isdecimal()
+
 
 def split_tokens(s: str) -> Tuple[List[str], str]:
     """Split a string of IDs into tokens; return tokens and a chosen output delimiter."""
     s = s.strip()
     
-    # JSON-like list: [26000000, 26000001]
-    if s.startswith("[") and s.endswith("]"):
-        toks = re.findall(r"-?\d+", s)
+    # Handles JSON-like lists ([26000000, 26000001]) and ,;| or space separated IDs
+    toks = s.translate(_DELIM_TABLE).split()
+    if len(toks) > 1 or (toks and is_int_token(toks[0])):
         return toks, ","
     
-    for d in DELIMS:
-        if d in s:
-            toks = [t for t in re.split(rf"\s*{re.escape(d)}\s*", s) if t != ""]
-            return toks, ","
-    
     # Fallback: extract any integers found
-    toks = re.findall(r"-?\d+", s)
+    toks = _INT_RE.findall(s)
     if toks:
         return toks, ","
     
@@ -98,12 +160,10 @@ def split_tokens(s: str) -> Tuple[List[str], str]:
 
 def map_id_token(tok: str, id_to_name: Dict[int, str]) -> str:
     """Map a single token (ID) to card name."""
-    try:
-        cid = int(tok)
-    except Exception:
+    if not is_int_token(tok):
         return tok  # non-integer token, leave as-is
     
-    return id_to_name.get(cid, tok)  # unknown IDs left as original token
+    return id_to_name.get(int(tok), tok)  # unknown IDs left as original token
 
 
 def looks_like_id_series(sample: List, id_keys: set, threshold: float = 0.6) -> bool:
@@ -126,7 +186,7 @@ def looks_like_id_series(sample: List, id_keys: set, threshold: float = 0.6) ->
                 continue
             
             # hit if most tokens are ints and at least one is in the mapping
-            int_toks = [t for t in toks if re.fullmatch(r"-?\d+", t)]
+            int_toks = [t for t in toks if is_int_token(t)]
             if int_toks and any(int(t) in id_keys for t in int_toks):
                 hits += 1
         
@@ -136,8 +196,17 @@ def looks_like_id_series(sample: List, id_keys: set, threshold: float = 0.6) ->
     return seen > 0 and (hits / seen) >= threshold
 
 
-def map_column_to_names(s: pd.Series, id_to_name: Dict[int, str]) -> pd.Series:
-    """Map a pandas Series containing card IDs to card names."""
+def map_column_to_names(
+    s: pd.Series,
+    id_to_name: Dict[int, str],
+    id_lut: Optional[Tuple[np.ndarray, int]] = None
+) -> pd.Series:
+    """
+    Map a pandas Series containing card IDs to card names.
+
+    Numeric columns are resolved through ``id_lut`` (built with
+    ``build_id_lut`` if not given); unknown IDs and NaNs are left as-is.
+    """
     id_keys = set(id_to_name.keys())
     
     def _map_cell(v):
@@ -153,113 +222,228 @@ def map_column_to_names(s: pd.Series, id_to_name: Dict[int, str]) -> pd.Series:
         return out_delim.join(str(m) for m in mapped)
     
     # Vectorized where possible
-    if np.issubdtype(s.dtype, np.number):
-        return s.map(lambda x: id_to_name.get(int(x), x) if not pd.isna(x) else x)
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        lut, offset = id_lut if id_lut is not None else build_id_lut(id_to_name)
+        idx = s.to_numpy(dtype=np.float64, na_value=np.nan) - offset
+        in_range = (idx >= 0) & (idx < len(lut))  # False for NaN
+        names = np.full(len(s), None, dtype=object)
+        names[in_range] = lut[idx[in_range].astype(np.int64)]
+        known = pd.notna(names)
+        result = s.astype(object).to_numpy(copy=True)
+        result[known] = names[known]
+        return pd.Series(result, index=s.index, name=s.name)
     
     return s.astype("string").map(_map_cell)
 
 
+def build_name_lut(id_lut: Tuple[np.ndarray, int]) -> Tuple[pa.Array, int]:
+    """
+    Convert a NumPy ID lookup table (see ``build_id_lut``) to Arrow.
+
+    Returns:
+        (lut, offset) where ``lut[card_id - offset]`` is the card name or null
+    """
+    lut, offset = id_lut
+    return pa.array(lut, type=pa.string()), offset
+
+
+# Characters stripped from the ends of an ID-list cell, and the regex that
+# splits on every delimiter at once (one native scan, no per-delimiter pass)
+_LIST_EDGE_CHARS = "[] \t,;|"
+_LIST_SPLIT_PATTERN = r"[\s,;|\[\]]+"
+
+
+def map_array_to_names(
+    arr: pa.Array,
+    id_to_name: Dict[int, str],
+    name_lut: Tuple[pa.Array, int],
+    id_lut: Optional[Tuple[np.ndarray, int]] = None
+) -> pa.Array:
+    """
+    Map an Arrow array of card IDs to a string array of card names.
+
+    Integer columns are resolved with a single ``take`` over ``name_lut``;
+    unknown IDs keep their numeric value (as a string) and nulls stay null.
+    String columns holding ID lists ("[1, 2]", "1;2", "1|2", ...) are split,
+    mapped and re-joined with "," entirely in Arrow compute kernels;
+    non-integer tokens are kept as-is. Other column types fall back to
+    ``map_column_to_names``.
+    """
+    if pa.types.is_integer(arr.type):
+        lut, offset = name_lut
+        idx = pc.subtract(arr, offset)
+        in_range = pc.and_(pc.greater_equal(idx, 0), pc.less(idx, len(lut)))
+        names = pc.take(lut, pc.if_else(in_range, idx, pa.scalar(None, type=idx.type)))
+        return pc.coalesce(names, pc.cast(arr, pa.string()))
+    
+    if pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type):
+        trimmed = pc.utf8_trim(arr, characters=_LIST_EDGE_CHARS)
+        tokens = pc.split_pattern_regex(trimmed, pattern=_LIST_SPLIT_PATTERN)
+        flat = tokens.values
+        is_int = pc.match_substring_regex(flat, pattern=r"^-?\d{1,18}$")  # fits int64
+        ids = pc.cast(pc.if_else(is_int, flat, pa.scalar(None, type=flat.type)), pa.int64())
+        mapped = pc.coalesce(map_array_to_names(ids, id_to_name, name_lut), flat)
+        joined = pc.binary_join(pa.ListArray.from_arrays(tokens.offsets, mapped), ",")
+        return pc.if_else(pc.is_null(arr), pa.scalar(None, type=pa.string()), joined)
+    
+    mapped = map_column_to_names(arr.to_pandas(), id_to_name, id_lut)
+    return pa.array(mapped.astype("string"), type=pa.string())
+
+
+def add_name_columns(
+    batch: pa.RecordBatch,
+    card_id_columns: List[str],
+    id_to_name: Dict[int, str],
+    name_lut: Tuple[pa.Array, int],
+    id_lut: Tuple[np.ndarray, int]
+) -> pa.RecordBatch:
+    """Append a ``*.name`` column for each card ID column of a record batch."""
+    for col in card_id_columns:
+        batch = batch.append_column(
+            col.replace('.id', '.name'),
+            map_array_to_names(batch.column(col), id_to_name, name_lut, id_lut)
+        )
+    return batch
+
+
+def write_batches(writer: pq.ParquetWriter, batches: queue.Queue, errors: List[Exception]) -> None:
+    """
+    Writer stage: write record batches from the queue until a None sentinel.
+
+    After a write error the queue is still drained (and batches dropped) so
+    the producer never blocks on a full queue; the error is left in ``errors``.
+    """
+    rows_done = 0
+    while True:
+        batch = batches.get()
+        if batch is None:
+            return
+        if errors:
+            continue
+        try:
+            writer.write_batch(batch)
+        except Exception as e:
+            errors.append(e)
+            continue
+        print(f"  Processed rows {rows_done+1:,}-{rows_done+batch.num_rows:,}")
+        rows_done += batch.num_rows
+
+
 def process_with_duckdb(battles_path: str, output_path: str, id_to_name: Dict[int, str]):
     """
-    Process battles.csv using DuckDB for efficient handling of large files.
+    Process battles.csv (or battles.parquet) using DuckDB for efficient
+    handling of large files.
     
     This function:
-    1. Creates a DuckDB view over battles.csv
+    1. Creates a DuckDB view over the battles file
     2. Identifies card ID columns
-    3. Processes data in chunks to add name columns
-    4. Writes output CSV
+    3. Streams record batches in a single scan to add name columns
+    4. Writes output Parquet
     """
     print(f"\nProcessing {battles_path}...")
     print("This may take a while for large files (9.2GB)...")
     
     # Create DuckDB connection
-    con = duckdb.connect()
-    
-    # Create view over battles.csv
-    print("Creating DuckDB view...")
-    # Normalize path for DuckDB (use forward slashes, escape single quotes)
-    battles_path_normalized = battles_path.replace("\\", "/").replace("'", "''")
-    con.execute(f"""
-        CREATE VIEW battles AS
-        SELECT * FROM read_csv_auto('{battles_path_normalized}',
-            SAMPLE_SIZE=-1,
-            IGNORE_ERRORS=true,
-            hive_partitioning=0
-        )
-    """)
-    
-    # Get schema to identify card columns
-    schema = con.sql("DESCRIBE battles").df()
-    all_columns = schema['column_name'].tolist()
-    
-    # Find card ID columns (winner.card1.id through winner.card8.id, same for loser)
-    card_id_columns = []
-    for col in all_columns:
-        # Match patterns like winner.card1.id, loser.card2.id, etc.
-        if re.match(r'^(winner|loser)\.card[1-8]\.id$', col):
-            card_id_columns.append(col)
-    
-    print(f"\nFound {len(card_id_columns)} card ID columns to process")
-    
-    if not card_id_columns:
-        print("⚠ Warning: No card ID columns found. Checking for other ID patterns...")
-        # Fallback: look for any column with 'card' and 'id' in name
-        for col in all_columns:
-            if 'card' in col.lower() and 'id' in col.lower():
-                card_id_columns.append(col)
+    workers = os.cpu_count() or 4
+    con = tuned_connection(threads=workers)
+    try:
+        # Create view over the battles file
+        print("Creating DuckDB view...")
+        # Normalize path for DuckDB (use forward slashes, escape single quotes)
+        battles_path_normalized = battles_path.replace("\\", "/").replace("'", "''")
+        if battles_path.endswith('.parquet'):
+            con.execute(f"""
+                CREATE VIEW battles AS
+                SELECT * FROM read_parquet('{battles_path_normalized}')
+            """)
+        else:
+            con.execute(f"""
+                CREATE VIEW battles AS
+                SELECT * FROM read_csv_auto('{battles_path_normalized}',
+                    SAMPLE_SIZE=-1,
+                    IGNORE_ERRORS=true,
+                    hive_partitioning=0
+                )
+            """)
+    
+        # Get schema to identify card columns
+        # Filter the column list inside DuckDB: one round-trip, no pandas frame
+        card_id_columns = [r[0] for r in con.execute(
+            "SELECT column_name FROM (DESCRIBE battles) "
+            "WHERE regexp_matches(column_name, '^(winner|loser)\\.card[1-8]\\.id$')"
+        ).fetchall()]
+    
+        print(f"\nFound {len(card_id_columns)} card ID columns to process")
+    
+        if not card_id_columns:
+            print("⚠ Warning: No card ID columns found. Checking for other ID patterns...")
+            # Fallback: look for any column with 'card' and 'id' in name
+            card_id_columns = [r[0] for r in con.execute(
+                "SELECT column_name FROM (DESCRIBE battles) "
+                "WHERE column_name ILIKE '%card%' AND column_name ILIKE '%id%'"
+            ).fetchall()]
+            for col in card_id_columns:
                 print(f"  Found: {col}")
     
-    if not card_id_columns:
-        print("❌ No card ID columns detected. Exiting.")
-        return
-    
-    # Process in chunks to avoid memory issues
-    chunk_size = 100000  # Process 100k rows at a time
-    total_rows = con.sql("SELECT COUNT(*) as cnt FROM battles").df()['cnt'].iloc[0]
-    print(f"Total rows: {total_rows:,}")
-    print(f"Processing in chunks of {chunk_size:,} rows...")
+        if not card_id_columns:
+            print("❌ No card ID columns detected. Exiting.")
+            return
     
-    # Get all column names for SELECT
-    all_cols_str = ', '.join([f'"{col}"' for col in all_columns])
+        # Stream the scan as Arrow record batches: one pass over the CSV instead
+        # of re-scanning and discarding OFFSET rows for every chunk
+        chunk_size = 100000  # Process 100k rows at a time
+        print(f"Processing in chunks of {chunk_size:,} rows...")
     
-    # Process first chunk to get structure
-    first_chunk = con.sql(f"""
-        SELECT {all_cols_str}
-        FROM battles
-        LIMIT {chunk_size}
-    """).df()
-    
-    # Add name columns
-    for col in card_id_columns:
-        name_col = col.replace('.id', '.name')
-        print(f"  Mapping {col} -> {name_col}...")
-        first_chunk[name_col] = map_column_to_names(first_chunk[col], id_to_name)
-    
-    # Write header
-    first_chunk.to_csv(output_path, index=False, mode='w', encoding='utf-8')
-    print(f"  Processed rows 1-{len(first_chunk):,}")
-    
-    # Process remaining chunks
-    offset = chunk_size
-    while offset < total_rows:
-        chunk = con.sql(f"""
-            SELECT {all_cols_str}
-            FROM battles
-            LIMIT {chunk_size} OFFSET {offset}
-        """).df()
-        
-        # Add name columns
         for col in card_id_columns:
-            name_col = col.replace('.id', '.name')
-            chunk[name_col] = map_column_to_names(chunk[col], id_to_name)
-        
-        # Append to file
-        chunk.to_csv(output_path, index=False, mode='a', header=False, encoding='utf-8')
-        print(f"  Processed rows {offset+1:,}-{offset+len(chunk):,}")
-        
-        offset += chunk_size
-    
-    con.close()
+            print(f"  Mapping {col} -> {col.replace('.id', '.name')}")
+    
+        reader = con.execute("SELECT * FROM battles").fetch_record_batch(chunk_size)
+    
+        # Output schema: original columns followed by one string column per ID column
+        schema_with_names = reader.schema
+        for name_col in [col.replace('.id', '.name') for col in card_id_columns]:
+            schema_with_names = schema_with_names.append(pa.field(name_col, pa.string()))
+    
+        # Batches stay in Arrow end to end: no pandas frame, no text rendering.
+        # Three overlapping stages joined by bounded queues: DuckDB scan (this
+        # thread) -> name lookup (worker pool) -> Parquet write (writer thread).
+        # DuckDB and Arrow kernels release the GIL, so the stages run in parallel.
+        id_lut = build_id_lut(id_to_name)
+        name_lut = build_name_lut(id_lut)
+        write_queue = queue.Queue(maxsize=2)
+        write_errors = []
+        with pq.ParquetWriter(
+            output_path,
+            schema_with_names,
+            compression='zstd',
+            use_dictionary=True
+        ) as writer:
+            writer_thread = threading.Thread(
+                target=write_batches, args=(writer, write_queue, write_errors), daemon=True
+            )
+            writer_thread.start()
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    # FIFO of pending lookups keeps output in scan order
+                    in_flight = deque()
+                    for batch in reader:
+                        in_flight.append(pool.submit(
+                            add_name_columns, batch, card_id_columns, id_to_name, name_lut, id_lut
+                        ))
+                        if len(in_flight) > workers:
+                            write_queue.put(in_flight.popleft().result())
+                    while in_flight:
+                        write_queue.put(in_flight.popleft().result())
+            finally:
+                write_queue.put(None)
+                writer_thread.join()
+    
+        if write_errors:
+            raise write_errors[0]
+    finally:
+        # Also on the error paths, e.g. a failed writer thread re-raised above
+        con.close()
+
     print(f"\n✓ Processing complete!")
     print(f"  Output saved to: {output_path}")
     
@@ -282,8 +466,15 @@ def main():
         print(f"❌ Error: cards.json not found at {paths['cards']}")
         return
     
-    if not os.path.exists(paths['battles']):
-        print(f"❌ Error: battles.csv not found at {paths['battles']}")
+    # Prefer the Parquet copy: only column chunks are decoded, no CSV parsing
+    if os.path.exists(paths['battles_parquet']):
+        battles_path = paths['battles_parquet']
+    elif os.path.exists(paths['battles']):
+        battles_path = paths['battles']
+    else:
+        print("❌ Error: no battles file found. Looked for:")
+        print(f"   {paths['battles_parquet']}")
+        print(f"   {paths['battles']}")
         return
     
     # Load card mappings
@@ -293,17 +484,17 @@ def main():
         print(f"❌ Error loading cards.json: {e}")
         return
     
-    # Process battles.csv
+    # Process the battles file (Parquet or CSV)
     try:
-        process_with_duckdb(paths['battles'], paths['output'], id_to_name)
+        process_with_duckdb(battles_path, paths['output'], id_to_name)
     except Exception as e:
-        print(f"❌ Error processing battles.csv: {e}")
+        print(f"❌ Error processing {battles_path}: {e}")
         import traceback
         traceback.print_exc()
         return
     
     print("\n" + "=" * 60)
-    print("✓ All done! You can now use battles_with_names.csv")
+    print("✓ All done! You can now use battles_with_names.parquet")
     print("=" * 60)
 
 
@@ -1,27 +1,31 @@
 # peek.py
-import duckdb, os
+import os, sys
 
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PARQUET = os.path.join(SCRIPT_DIR, 'battles.parquet')
 CSV = os.path.join(SCRIPT_DIR, 'battles.csv')  # Fallback
 
-con = duckdb.connect()                         # in-memory SQL engine
+sys.path.insert(0, os.path.join(SCRIPT_DIR, 'src'))
+from duckdb_utils import estimate_csv_rows, tuned_connection
+
+con = tuned_connection()                       # in-memory SQL engine, all cores
 
 # Use Parquet if available (faster), otherwise fall back to CSV
 if os.path.exists(PARQUET):
     print("Using battles.parquet (faster queries)...")
+    parquet_path = PARQUET.replace("\\", "/")
     con.execute(f"""
     CREATE VIEW v AS
-    SELECT * FROM read_parquet('{PARQUET.replace("\\", "/")}');
+    SELECT * FROM read_parquet('{parquet_path}');
     """)
 else:
     print("Using battles.csv (Parquet not found, consider converting for faster queries)...")
+    csv_path = CSV.replace("\\", "/")
     con.execute(f"""
     CREATE VIEW v AS
-    SELECT * FROM read_csv_auto('{CSV.replace("\\", "/")}',
-      SAMPLE_SIZE=-1,            -- robust type inference
-      IGNORE_ERRORS=true,
+    SELECT * FROM read_csv_auto('{csv_path}',
+      IGNORE_ERRORS=true,        -- default sample for type inference (no full pre-scan)
       hive_partitioning=0
     );
     """)
@@ -32,5 +36,9 @@ print(con.sql("SELECT * FROM v LIMIT 50").df())  # first 50 rows
 print("\nSchema:")
 print(con.sql("DESCRIBE v").df())                # column names + inferred types
 
-print("\nRow count estimate (fast approximate):")
-print(con.sql("SELECT COUNT(*) AS rows FROM v").df())
+if os.path.exists(PARQUET):
+    print("\nRow count (from Parquet footer, no data pages read):")
+    print(con.sql(f"SELECT SUM(num_rows)::BIGINT AS rows FROM parquet_file_metadata('{parquet_path}')").df())
+else:
+    print("\nRow count estimate (from file size, no full CSV scan):")
+    print(f"~{estimate_csv_rows(CSV):,} rows")
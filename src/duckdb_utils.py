@@ -4,25 +4,229 @@ DuckDB Utility Functions
 Helper functions for working with the large battles.csv dataset.
 """
 
+import os
+from contextlib import contextmanager
+
 import duckdb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 from typing import Optional, Union
 
 
-def get_connection(db_path: Optional[str] = None) -> duckdb.DuckDBPyConnection:
+def _physical_cores() -> int:
+    """Physical CPU cores (psutil if installed, else half the logical count)."""
+    try:
+        import psutil
+        cores = psutil.cpu_count(logical=False)
+    except ImportError:
+        cores = None
+    return cores or max(1, (os.cpu_count() or 2) // 2)
+
+
+def get_connection(
+    db_path: Optional[str] = None,
+    threads: Optional[int] = None,
+    preserve_insertion_order: bool = False,
+    memory_limit: Optional[str] = None,
+    temp_directory: Optional[str] = None
+) -> duckdb.DuckDBPyConnection:
     """
     Create a DuckDB connection.
 
+    Defaults suit large scans: one thread per physical core (hyperthreads
+    only add contention) and no insertion-order preservation, which lets
+    larger-than-RAM scans and COPYs stream instead of buffering.
+
     Args:
         db_path: Path to persistent database file. If None, creates in-memory DB.
+        threads: Worker threads (None = physical cores)
+        preserve_insertion_order: Keep result order without ORDER BY
+        memory_limit: e.g. '8GB' (None = DuckDB's default, 80% of RAM)
+        temp_directory: Spill directory, ideally on a fast local SSD
+
+    Returns:
+        DuckDB connection object
+    """
+    con = duckdb.connect(db_path) if db_path else duckdb.connect()
+    con.execute(f"SET threads={threads or _physical_cores()}")
+    con.execute(f"SET preserve_insertion_order={str(preserve_insertion_order).lower()}")
+    if memory_limit:
+        con.execute(f"SET memory_limit='{memory_limit}'")
+    if temp_directory:
+        temp_dir_norm = temp_directory.replace("\\", "/").replace("'", "''")
+        con.execute(f"SET temp_directory='{temp_dir_norm}'")
+    return con
+
+
+@contextmanager
+def _insertion_order_off(con: duckdb.DuckDBPyConnection):
+    """Disable preserve_insertion_order for one statement, then restore it."""
+    previous = con.execute("SELECT current_setting('preserve_insertion_order')").fetchone()[0]
+    con.execute("SET preserve_insertion_order=false")
+    try:
+        yield
+    finally:
+        con.execute(f"SET preserve_insertion_order={str(previous).lower()}")
+
+
+def tuned_connection(
+    threads: Optional[int] = None,
+    memory_fraction: float = 0.7
+) -> duckdb.DuckDBPyConnection:
+    """
+    Create an in-memory DuckDB connection tuned for large scans.
+
+    Uses all CPU cores, caps memory at a fraction of available RAM (when
+    psutil is installed), enables the object cache so repeated Parquet
+    footer reads are cached, and disables insertion-order preservation so
+    CSV/Parquet scans can run fully in parallel.
+
+    Args:
+        threads: Worker threads (None = os.cpu_count())
+        memory_fraction: Fraction of currently available RAM DuckDB may use
 
     Returns:
         DuckDB connection object
     """
-    if db_path:
-        return duckdb.connect(db_path)
-    return duckdb.connect()
+    memory_limit = None
+    try:
+        import psutil
+        limit_gb = int(psutil.virtual_memory().available * memory_fraction // (1024 ** 3))
+        if limit_gb > 0:
+            memory_limit = f'{limit_gb}GB'
+    except ImportError:
+        pass  # keep DuckDB's default (80% of RAM)
+
+    con = get_connection(threads=threads or os.cpu_count() or 4, memory_limit=memory_limit)
+    con.execute("SET enable_object_cache=true")
+    return con
+
+
+def estimate_csv_rows(csv_path: str, sample_bytes: int = 1024 ** 2) -> int:
+    """
+    Estimate the number of data rows in a CSV from the average line length
+    of its first ``sample_bytes`` bytes (no full scan).
+    """
+    with open(csv_path, 'rb') as f:
+        f.readline()  # skip header
+        sample = f.read(sample_bytes)
+    lines = sample.count(b'\n')
+    if lines == 0:
+        return 0
+    avg_line_bytes = len(sample) / lines
+    return int(os.path.getsize(csv_path) / avg_line_bytes)
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a table/view/column name for SQL (embedded quotes are doubled)."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _materialize_csv(
+    con: duckdb.DuckDBPyConnection,
+    csv_path: str,
+    db_path: str,
+    table_name: str,
+    sample_size: int
+) -> str:
+    """
+    Ingest a CSV into a native table in a persistent DuckDB file.
+
+    The file is attached to ``con`` and the CSV is only re-ingested when its
+    mtime differs from the one recorded at the last ingest.
+
+    Returns:
+        Qualified name of the native table (``<alias>.<table_name>``)
+    """
+    alias = quote_identifier(f"{table_name}_store")
+    table = quote_identifier(table_name)
+    db_path_norm = db_path.replace("\\", "/").replace("'", "''")
+    csv_path_norm = csv_path.replace("\\", "/").replace("'", "''")
+    csv_mtime = os.path.getmtime(csv_path)
+
+    con.execute(f"ATTACH IF NOT EXISTS '{db_path_norm}' AS {alias}")
+    con.execute(f"CREATE TABLE IF NOT EXISTS {alias}._ingest_meta (table_name VARCHAR, source_mtime DOUBLE)")
+    recorded = con.execute(
+        f"SELECT source_mtime FROM {alias}._ingest_meta WHERE table_name = ?", [table_name]
+    ).fetchone()
+
+    if recorded is None or recorded[0] != csv_mtime:
+        print(f"Ingesting {csv_path} into {db_path} (one-time, re-run only if the CSV changes)...")
+        # Lets the CSV scan run fully parallel with bounded memory
+        with _insertion_order_off(con):
+            con.execute(f"""
+                CREATE OR REPLACE TABLE {alias}.{table} AS
+                SELECT * FROM read_csv_auto('{csv_path_norm}',
+                    SAMPLE_SIZE={sample_size},
+                    IGNORE_ERRORS=true,
+                    hive_partitioning=0
+                )
+            """)
+        con.execute(f"DELETE FROM {alias}._ingest_meta WHERE table_name = ?", [table_name])
+        con.execute(f"INSERT INTO {alias}._ingest_meta VALUES (?, ?)", [table_name, csv_mtime])
+
+    return f"{alias}.{table}"
+
+
+def convert_to_parquet(
+    con: duckdb.DuckDBPyConnection,
+    csv_path: str,
+    parquet_path: Optional[str] = None,
+    compression: str = 'zstd',
+    row_group_size: int = 122_880,
+    sample_size: int = -1
+) -> str:
+    """
+    Convert a CSV to Parquet with DuckDB's COPY.
+
+    Row groups default to 122,880 rows, DuckDB's own unit of parallelism.
+    The file is written to ``<parquet_path>.tmp`` and renamed when complete.
+    For the full-featured converter see convert_to_parquet.py.
+
+    Args:
+        con: DuckDB connection
+        csv_path: Path to input CSV file
+        parquet_path: Output path (default: csv_path with .parquet)
+        compression: Parquet compression codec
+        row_group_size: Rows per row group
+        sample_size: Number of rows to sample for type inference (-1 = all)
+
+    Returns:
+        Path of the written Parquet file
+    """
+    if parquet_path is None:
+        parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    tmp_path = f"{parquet_path}.tmp"
+    csv_path_norm = csv_path.replace("\\", "/").replace("'", "''")
+    tmp_path_norm = tmp_path.replace("\\", "/").replace("'", "''")
+
+    print(f"Converting {csv_path} to Parquet (one-time)...")
+    try:
+        # Bounded memory on larger-than-RAM inputs
+        with _insertion_order_off(con):
+            con.execute(f"""
+                COPY (
+                    SELECT * FROM read_csv_auto('{csv_path_norm}',
+                        SAMPLE_SIZE={sample_size},
+                        IGNORE_ERRORS=true,
+                        hive_partitioning=0
+                    )
+                ) TO '{tmp_path_norm}' (
+                    FORMAT PARQUET,
+                    COMPRESSION '{compression}',
+                    ROW_GROUP_SIZE {row_group_size}
+                )
+            """)
+        os.replace(tmp_path, parquet_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    size_mb = os.path.getsize(parquet_path) / (1024 * 1024)
+    print(f"✓ Wrote {parquet_path} ({size_mb:.1f} MB)")
+    return parquet_path
 
 
 def create_battles_view(
@@ -30,54 +234,73 @@ def create_battles_view(
     csv_path: str = 'battles.csv',
     view_name: str = 'battles',
     sample_size: int = -1,
-    prefer_parquet: bool = True
+    prefer_parquet: bool = True,
+    materialize: bool = True,
+    db_path: Optional[str] = None
 ) -> None:
     """
     Create a view over the battles dataset (CSV or Parquet).
 
-    Automatically uses Parquet if available (faster), otherwise falls back to CSV.
+    Automatically uses Parquet if available (faster). With ``prefer_parquet``
+    a CSV without a sibling .parquet is converted once (convert_to_parquet);
     Parquet files are typically 5-10x smaller and 10-50x faster for queries.
+    Otherwise a CSV is ingested once into a native DuckDB table (when
+    ``materialize``) so later queries scan columnar storage instead of
+    re-parsing text.
 
     Args:
         con: DuckDB connection
         csv_path: Path to battles.csv file (or battles.parquet)
         view_name: Name for the view (default: 'battles')
         sample_size: Number of rows to sample for type inference (-1 = all, CSV only)
-        prefer_parquet: If True, automatically look for .parquet version of file
+        prefer_parquet: If True, use (or create) a .parquet version of the file
+        materialize: If True, back a CSV source with a persistent native table
+        db_path: DuckDB file for the native table (default: CSV path with .duckdb)
 
     Example:
         >>> con = get_connection()
-        >>> create_battles_view(con, 'battles.csv')  # Uses battles.parquet if exists
+        >>> create_battles_view(con, 'battles.csv')  # Uses/creates battles.parquet
         >>> df = con.sql("SELECT COUNT(*) FROM battles").df()
     """
-    import os
-    
     # Normalize path for DuckDB (forward slashes, escape quotes)
     def normalize_path(path: str) -> str:
         return path.replace("\\", "/").replace("'", "''")
+
+    # Views cannot take bound parameters, so names and paths are quoted instead
+    view = quote_identifier(view_name)
     
     # Check for Parquet version if prefer_parquet is True
     file_path = csv_path
     if prefer_parquet and csv_path.endswith('.csv'):
         parquet_path = csv_path.replace('.csv', '.parquet')
         if os.path.exists(parquet_path):
-            file_path = parquet_path
             print(f"✓ Found Parquet file: {parquet_path} (using this for faster queries)")
+        else:
+            convert_to_parquet(con, csv_path, parquet_path, sample_size=sample_size)
+        file_path = parquet_path
     
     # Determine file type and create appropriate view
     if file_path.endswith('.parquet'):
         # Use Parquet (faster, compressed)
         file_path_norm = normalize_path(file_path)
         con.execute(f"""
-            CREATE OR REPLACE VIEW {view_name} AS
+            CREATE OR REPLACE VIEW {view} AS
             SELECT * FROM read_parquet('{file_path_norm}')
         """)
         print(f"✓ Created view '{view_name}' from Parquet: {file_path}")
+    elif materialize:
+        # Native table: parsed once, then scanned like any DuckDB table
+        table = _materialize_csv(
+            con, file_path, db_path or os.path.splitext(file_path)[0] + '.duckdb',
+            view_name, sample_size
+        )
+        con.execute(f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM {table}")
+        print(f"✓ Created view '{view_name}' from native table {table}")
     else:
         # Use CSV (slower but no conversion needed)
         file_path_norm = normalize_path(file_path)
         con.execute(f"""
-            CREATE OR REPLACE VIEW {view_name} AS
+            CREATE OR REPLACE VIEW {view} AS
             SELECT * FROM read_csv_auto('{file_path_norm}',
                 SAMPLE_SIZE={sample_size},
                 IGNORE_ERRORS=true,
@@ -85,31 +308,119 @@ def create_battles_view(
             )
         """)
         print(f"✓ Created view '{view_name}' from CSV: {file_path}")
-        if prefer_parquet:
-            print(f"  💡 Tip: Convert to Parquet for 10-50x faster queries:")
-            print(f"     python convert_to_parquet.py --input {file_path}")
+
+    # A cached copy of the previous source would now be stale
+    con.execute(f"DROP TABLE IF EXISTS temp.{quote_identifier(view_name + '_mat')}")
+
+
+_MEMORY_UNITS = {
+    'bytes': 1, 'kb': 1000, 'mb': 1000 ** 2, 'gb': 1000 ** 3, 'tb': 1000 ** 4,
+    'kib': 1024, 'mib': 1024 ** 2, 'gib': 1024 ** 3, 'tib': 1024 ** 4
+}
+
+
+def _memory_limit_bytes(con: duckdb.DuckDBPyConnection) -> Optional[float]:
+    """DuckDB's memory_limit setting (e.g. '4.6 GiB') in bytes, or None if unset."""
+    value, _, unit = con.execute(
+        "SELECT current_setting('memory_limit')"
+    ).fetchone()[0].partition(' ')
+    try:
+        return float(value) * _MEMORY_UNITS[unit.lower() or 'bytes']
+    except (ValueError, KeyError):
+        return None
+
+
+def _resolve_view(con: duckdb.DuckDBPyConnection, view_name: str) -> str:
+    """Return the materialized copy of view_name if one exists, else view_name."""
+    materialized = con.execute(
+        "SELECT 1 FROM duckdb_tables() WHERE temporary AND table_name = ?",
+        [f"{view_name}_mat"]
+    ).fetchone()
+    return f"{view_name}_mat" if materialized else view_name
+
+
+def ensure_materialized(
+    con: duckdb.DuckDBPyConnection,
+    view_name: str = 'battles',
+    memory_fraction: float = 0.5
+) -> str:
+    """
+    Cache a view in a temp table so repeated queries scan it only once.
+
+    Creates ``<view_name>_mat`` (once per connection) if its estimated size
+    fits in ``memory_fraction`` of DuckDB's memory limit. get_null_counts and
+    create_sample use the cached table automatically when it exists.
+    create_battles_view drops it when the view is redefined.
+
+    Args:
+        con: DuckDB connection
+        view_name: Name of the view to cache
+        memory_fraction: Share of DuckDB's memory_limit the copy may take
+
+    Returns:
+        Name to query: ``<view_name>_mat``, or ``view_name`` if too large
+
+    Example:
+        >>> table = ensure_materialized(con, 'battles')
+        >>> nulls = get_null_counts(con)  # scans battles_mat
+    """
+    table = _resolve_view(con, view_name)
+    if table != view_name:
+        return table
+
+    # Rough size: 8 bytes per value (row counts are metadata-only for
+    # Parquet and native tables)
+    view = quote_identifier(view_name)
+    rows = con.execute(f"SELECT COUNT(*) FROM {view}").fetchone()[0]
+    num_columns = len(con.execute(f"DESCRIBE {view}").fetchall())
+    estimated_bytes = rows * num_columns * 8
+    limit = _memory_limit_bytes(con)
+    if limit is not None and estimated_bytes > limit * memory_fraction:
+        print(f"⚠ Not materializing '{view_name}': ~{estimated_bytes / 1024 ** 3:.1f} GB "
+              f"exceeds {memory_fraction:.0%} of the memory limit")
+        return view_name
+
+    table = quote_identifier(f"{view_name}_mat")
+    con.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} AS SELECT * FROM {view}")
+    print(f"✓ Materialized '{view_name}' as temp table '{view_name}_mat' ({rows:,} rows)")
+    return f"{view_name}_mat"
 
 
 def query_to_df(
     con: duckdb.DuckDBPyConnection,
     query: str,
-    show_progress: bool = True
-) -> pd.DataFrame:
+    show_progress: bool = True,
+    params: Optional[Union[list, dict]] = None,
+    output: str = 'pandas'
+) -> Union[pd.DataFrame, pa.Table]:
     """
     Execute a SQL query and return results as pandas DataFrame.
 
     Args:
         con: DuckDB connection
-        query: SQL query string
+        query: SQL query string (use ? or $name placeholders for values)
         show_progress: Whether to print query execution message
+        params: Values bound to the query's placeholders
+        output: 'pandas' for a DataFrame, or 'arrow' for a pyarrow.Table
+            that skips the pandas conversion (fixed-width columns can then
+            be read as NumPy views via ``table.column(c).to_numpy()``)
 
     Returns:
-        pandas DataFrame with query results
+        pandas DataFrame (or pyarrow Table) with query results
     """
+    if output not in ('pandas', 'arrow'):
+        raise ValueError(f"output must be 'pandas' or 'arrow', got {output!r}")
+
     if show_progress:
         print(f"Executing query...")
 
-    result = con.sql(query).df()
+    cursor = con.execute(query, params)
+    if output == 'arrow':
+        # to_arrow_table() on newer duckdb, fetch_arrow_table() before
+        fetch_arrow = getattr(cursor, 'to_arrow_table', None) or cursor.fetch_arrow_table
+        result = fetch_arrow()
+    else:
+        result = cursor.df()
 
     if show_progress:
         print(f"✓ Returned {len(result):,} rows, {len(result.columns)} columns")
@@ -120,15 +431,24 @@ def query_to_df(
 def save_to_parquet(
     df: pd.DataFrame,
     filepath: Union[str, Path],
-    compression: str = 'snappy'
+    compression: str = 'zstd',
+    compression_level: Optional[int] = 3,
+    row_group_size: int = 122_880,
+    **write_kwargs
 ) -> None:
     """
     Save DataFrame to Parquet format.
 
+    Written with pyarrow, dictionary-encoded, in row groups sized like
+    DuckDB's (122,880 rows) so later read_parquet scans parallelize evenly.
+
     Args:
         df: pandas DataFrame
         filepath: Output path (e.g., 'artifacts/card_stats.parquet')
-        compression: Compression algorithm ('snappy', 'gzip', 'brotli')
+        compression: Compression algorithm ('zstd', 'snappy', 'gzip', 'brotli')
+        compression_level: Codec level (ignored by codecs without levels)
+        row_group_size: Rows per row group
+        **write_kwargs: Extra options for pyarrow.parquet.write_table
 
     Example:
         >>> card_stats = query_to_df(con, "SELECT ...")
@@ -137,7 +457,18 @@ def save_to_parquet(
     filepath = Path(filepath)
     filepath.parent.mkdir(parents=True, exist_ok=True)
 
-    df.to_parquet(filepath, compression=compression, index=False)
+    if compression not in ('zstd', 'gzip', 'brotli'):
+        compression_level = None
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(
+        table,
+        filepath,
+        compression=compression,
+        compression_level=compression_level,
+        use_dictionary=write_kwargs.pop('use_dictionary', True),
+        row_group_size=row_group_size,
+        **write_kwargs
+    )
 
     size_mb = filepath.stat().st_size / (1024 * 1024)
     print(f"✓ Saved {len(df):,} rows to {filepath} ({size_mb:.1f} MB)")
@@ -173,29 +504,45 @@ def create_sample(
         view_name: Name of the battles view
         sample_pct: Percentage of data to sample (0-100)
         output_path: Where to save the sample
-        stratify_by: Column to stratify by (e.g., 'arena.id')
+        stratify_by: Column to stratify by, as a plain column name (e.g.,
+            'arena.id'); it is quoted here
 
     Returns:
         pandas DataFrame with sampled data
 
+    Raises:
+        ValueError: If ``stratify_by`` is not a column of the view
+
     Example:
-        >>> sample = create_sample(con, sample_pct=10, stratify_by='"arena.id"')
+        >>> sample = create_sample(con, sample_pct=10, stratify_by='arena.id')
     """
+    view = quote_identifier(_resolve_view(con, view_name))
+    params = None
     if stratify_by:
-        # Stratified sampling (maintains distribution of stratify_by column)
+        # Accept an already-quoted name too ('"arena.id"')
+        if len(stratify_by) > 1 and stratify_by[0] == stratify_by[-1] == '"':
+            stratify_by = stratify_by[1:-1].replace('""', '"')
+        columns = [r[0] for r in con.execute(f"DESCRIBE {view}").fetchall()]
+        if stratify_by not in columns:
+            raise ValueError(f"Cannot stratify by {stratify_by!r}: no such column in {view_name}")
+        stratify_col = quote_identifier(stratify_by)
+        # Stratified sampling with proportional allocation: each stratum
+        # keeps round(N_i * pct) rows chosen at random, in a single scan
         query = f"""
-            SELECT * FROM {view_name}
-            WHERE random() < {sample_pct / 100.0}
+            SELECT * FROM {view}
+            QUALIFY row_number() OVER (PARTITION BY {stratify_col} ORDER BY random())
+                <= round(COUNT(*) OVER (PARTITION BY {stratify_col}) * ?)
         """
+        params = [sample_pct / 100.0]
     else:
-        # Simple random sampling
+        # Simple random sampling (SAMPLE takes a literal, not a parameter)
         query = f"""
-            SELECT * FROM {view_name}
-            USING SAMPLE {sample_pct}% (bernoulli)
+            SELECT * FROM {view}
+            USING SAMPLE {float(sample_pct)}% (bernoulli)
         """
 
     print(f"Creating {sample_pct}% sample...")
-    sample_df = query_to_df(con, query, show_progress=False)
+    sample_df = query_to_df(con, query, show_progress=False, params=params)
 
     save_to_parquet(sample_df, output_path)
 
@@ -213,7 +560,7 @@ def get_schema(con: duckdb.DuckDBPyConnection, view_name: str = 'battles') -> pd
     Returns:
         DataFrame with columns: column_name, column_type, null, key, default, extra
     """
-    schema = con.sql(f"DESCRIBE {view_name}").df()
+    schema = con.execute(f"DESCRIBE {quote_identifier(view_name)}").df()
     print(f"Schema for '{view_name}':")
     print(f"  {len(schema)} columns")
     return schema
@@ -228,59 +575,39 @@ def get_null_counts(
     """
     Get null counts for all columns (or specified columns).
     
-    Processes columns in batches to avoid buffer overflow on large datasets.
+    All columns are counted in a single aggregate query, so the view is
+    scanned once regardless of how many columns are checked.
 
     Args:
         con: DuckDB connection
         view_name: Name of the view
         columns: List of column names to check (None = all columns)
-        batch_size: Number of columns to process per batch (default: 20)
+        batch_size: Unused; kept for backward compatibility
 
     Returns:
         DataFrame with columns: column_name, null_count, null_percentage
     """
+    view = quote_identifier(_resolve_view(con, view_name))
     if columns is None:
         # Get all column names
-        schema = con.sql(f"DESCRIBE {view_name}").df()
+        schema = con.execute(f"DESCRIBE {view}").df()
         columns = schema['column_name'].tolist()
 
-    # Get total row count once
-    total_rows_result = con.sql(f"SELECT COUNT(*) as total_rows FROM {view_name}").df()
-    total_rows = total_rows_result['total_rows'].iloc[0]
-
-    # Process columns in batches to avoid buffer overflow
-    null_data = []
-    num_batches = (len(columns) + batch_size - 1) // batch_size
-    
-    for batch_idx in range(num_batches):
-        start_idx = batch_idx * batch_size
-        end_idx = min(start_idx + batch_size, len(columns))
-        batch_columns = columns[start_idx:end_idx]
-        
-        # Build query to count nulls for this batch of columns
-        null_checks = [
-            f'SUM(CASE WHEN "{col}" IS NULL THEN 1 ELSE 0 END) as "{col}_nulls"'
-            for col in batch_columns
+    # COUNT(col) skips NULLs, so nulls = COUNT(*) - COUNT(col)
+    counts = [f'COUNT({quote_identifier(col)})' for col in columns]
+    row = con.execute(f"""
+        SELECT COUNT(*), {', '.join(counts)}
+        FROM {view}
+    """).fetchone()
+    total_rows = row[0]
+
+    null_counts = [total_rows - non_null for non_null in row[1:]]
+    null_df = pd.DataFrame({
+        'column_name': columns,
+        'null_count': null_counts,
+        'null_percentage': [
+            (n / total_rows) * 100 if total_rows else 0.0 for n in null_counts
         ]
-
-        query = f"""
-            SELECT
-                {', '.join(null_checks)}
-            FROM {view_name}
-        """
-
-        result = con.sql(query).df()
-        
-        # Process results for this batch
-        for col in batch_columns:
-            null_count = result[f'{col}_nulls'].iloc[0]
-            null_pct = (null_count / total_rows) * 100
-            null_data.append({
-                'column_name': col,
-                'null_count': null_count,
-                'null_percentage': null_pct
-            })
-
-    null_df = pd.DataFrame(null_data).sort_values('null_percentage', ascending=False)
+    }).sort_values('null_percentage', ascending=False)
 
     return null_df
@@ -2,11 +2,15 @@
 Feature Engineering Functions
 
 Functions for creating derived features from battle data.
+
+The create_*_features functions never modify their input: they return a new
+frame with the feature columns added (or add them to df when inplace=True).
 """
 
+import duckdb
 import pandas as pd
 import numpy as np
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 
 
 def calculate_deck_complexity(
@@ -38,6 +42,106 @@ def calculate_deck_complexity(
     return complexity
 
 
+# calculate_deck_complexity weights folded into its normalizers
+_ELIXIR_WEIGHT = 0.4 / 5.0
+_SPELL_WEIGHT = 0.3 / 8.0
+_LEGENDARY_WEIGHT = 0.3 / 8.0
+
+
+def calculate_deck_complexity_vec(df: pd.DataFrame, player: str = 'winner') -> np.ndarray:
+    """
+    Vectorized calculate_deck_complexity for every battle in df.
+
+    Args:
+        df: Battle DataFrame with {player}.elixir.average, .spell.count
+            and .legendary.count columns
+        player: 'winner' or 'loser'
+
+    Returns:
+        Array of complexity scores, one per row
+    """
+    return (_ELIXIR_WEIGHT * df[f'{player}.elixir.average'].to_numpy(dtype=np.float64) +
+            _SPELL_WEIGHT * df[f'{player}.spell.count'].to_numpy(dtype=np.float64) +
+            _LEGENDARY_WEIGHT * df[f'{player}.legendary.count'].to_numpy(dtype=np.float64))
+
+
+def _battle_dtypes() -> dict:
+    """Narrowest dtypes that hold each battle stat (levels 1-15, crowns 0-3, ...)."""
+    dtypes = {}
+    for player in ('winner', 'loser'):
+        dtypes.update({f'{player}.card{i}.level': 'int8' for i in range(1, 9)})
+        dtypes.update({
+            f'{player}.crowns': 'int8',
+            f'{player}.spell.count': 'int8',
+            f'{player}.structure.count': 'int8',
+            f'{player}.legendary.count': 'int8',
+            f'{player}.totalcard.level': 'int16',
+            f'{player}.elixir.average': 'float32',
+        })
+    return dtypes
+
+
+BATTLE_DTYPES = _battle_dtypes()
+
+_SQL_TYPES = {'int8': 'TINYINT', 'int16': 'SMALLINT', 'float32': 'FLOAT'}
+
+
+def downcast_battle_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Downcast battle stat columns to the narrow dtypes in BATTLE_DTYPES.
+
+    Call once after loading, before feature engineering. Integer columns
+    that contain NaN become float32 instead.
+
+    Args:
+        df: Battle DataFrame
+
+    Returns:
+        DataFrame with downcast columns (others untouched)
+    """
+    dtype_map = {}
+    for col, dtype in BATTLE_DTYPES.items():
+        if col not in df.columns:
+            continue
+        if dtype.startswith('int') and df[col].isna().any():
+            dtype = 'float32'
+        dtype_map[col] = dtype
+
+    return df.astype(dtype_map)
+
+
+def build_downcast_sql(columns: Optional[List[str]] = None) -> str:
+    """
+    SQL equivalent of downcast_battle_dtypes, casting at query time.
+
+    Args:
+        columns: Available source columns (None = assume all)
+
+    Returns:
+        Select list like ``* REPLACE (CAST("winner.crowns" AS TINYINT) AS "winner.crowns", ...)``
+
+    Example:
+        >>> df = query_to_df(con, f"SELECT {build_downcast_sql()} FROM battles")
+    """
+    casts = [
+        f'CAST("{col}" AS {_SQL_TYPES[dtype]}) AS "{col}"'
+        for col, dtype in BATTLE_DTYPES.items()
+        if columns is None or col in columns
+    ]
+    if not casts:
+        return '*'
+    return '* REPLACE (' + ', '.join(casts) + ')'
+
+
+def _with_columns(df: pd.DataFrame, new_cols: dict, inplace: bool) -> pd.DataFrame:
+    """Add new_cols to df itself (inplace) or to a new frame via df.assign."""
+    if not inplace:
+        return df.assign(**new_cols)
+    for name, values in new_cols.items():
+        df[name] = values
+    return df
+
+
 def extract_card_columns(df: pd.DataFrame, player: str = 'winner') -> List[str]:
     """
     Extract card ID columns for a player.
@@ -53,172 +157,406 @@ def extract_card_columns(df: pd.DataFrame, player: str = 'winner') -> List[str]:
     return [col for col in card_cols if col in df.columns]
 
 
-def create_card_level_features(df: pd.DataFrame, player: str = 'winner') -> pd.DataFrame:
+def create_card_level_features(
+    df: pd.DataFrame,
+    player: str = 'winner',
+    inplace: bool = False
+) -> pd.DataFrame:
     """
     Create aggregated card level features.
 
     Args:
         df: Battle DataFrame
         player: 'winner' or 'loser'
+        inplace: Add the columns to df itself instead of a new frame
 
     Returns:
-        DataFrame with new columns: avg_card_level, min_card_level, max_card_level
+        DataFrame with new float32 columns: avg_card_level, min_card_level,
+        max_card_level, level_std (NaN levels are skipped, std uses ddof=1)
     """
     level_cols = [f'{player}.card{i}.level' for i in range(1, 9)]
     level_cols = [col for col in level_cols if col in df.columns]
 
-    result = df.copy()
-    result[f'{player}_avg_card_level'] = df[level_cols].mean(axis=1)
-    result[f'{player}_min_card_level'] = df[level_cols].min(axis=1)
-    result[f'{player}_max_card_level'] = df[level_cols].max(axis=1)
-    result[f'{player}_level_std'] = df[level_cols].std(axis=1)
-
-    return result
-
-
-def create_deck_archetype_features(df: pd.DataFrame, player: str = 'winner') -> pd.DataFrame:
+    # Card levels are small integers: float32 is exact and halves the bytes.
+    # Sum and sum of squares give mean and std in one pass over the matrix.
+    levels = df[level_cols].to_numpy(dtype=np.float32, na_value=np.nan)
+    present = ~np.isnan(levels)
+    filled = np.where(present, levels, 0)
+    n = present.sum(axis=1)
+    total = filled.sum(axis=1)
+    total_sq = (filled * filled).sum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (total / n).astype(np.float32)
+        var = (total_sq - total * mean) / (n - 1)
+        std = np.sqrt(np.maximum(var, 0)).astype(np.float32)
+    std[n < 2] = np.nan
+
+    level_min = np.where(present, levels, np.inf).min(axis=1, initial=np.inf)
+    level_max = np.where(present, levels, -np.inf).max(axis=1, initial=-np.inf)
+    level_min[n == 0] = np.nan
+    level_max[n == 0] = np.nan
+
+    return _with_columns(df, {
+        f'{player}_avg_card_level': mean,
+        f'{player}_min_card_level': level_min,
+        f'{player}_max_card_level': level_max,
+        f'{player}_level_std': std
+    }, inplace)
+
+
+def create_deck_archetype_features(
+    df: pd.DataFrame,
+    player: str = 'winner',
+    inplace: bool = False
+) -> pd.DataFrame:
     """
     Create deck archetype features based on card composition.
 
     Args:
         df: Battle DataFrame with columns like 'winner.troop.count', 'winner.spell.count'
         player: 'winner' or 'loser'
+        inplace: Add the columns to df itself instead of a new frame
 
     Returns:
         DataFrame with new archetype indicator columns
     """
-    result = df.copy()
+    new_cols = {}
 
     # Spell-heavy deck (3+ spells)
     if f'{player}.spell.count' in df.columns:
-        result[f'{player}_spell_heavy'] = (df[f'{player}.spell.count'] >= 3).astype(int)
+        new_cols[f'{player}_spell_heavy'] = (df[f'{player}.spell.count'].to_numpy() >= 3).astype(int)
 
     # Beatdown deck (high avg elixir)
     if f'{player}.elixir.average' in df.columns:
-        result[f'{player}_beatdown'] = (df[f'{player}.elixir.average'] >= 4.0).astype(int)
+        new_cols[f'{player}_beatdown'] = (df[f'{player}.elixir.average'].to_numpy() >= 4.0).astype(int)
 
     # Cycle deck (low avg elixir)
     if f'{player}.elixir.average' in df.columns:
-        result[f'{player}_cycle'] = (df[f'{player}.elixir.average'] <= 3.0).astype(int)
+        new_cols[f'{player}_cycle'] = (df[f'{player}.elixir.average'].to_numpy() <= 3.0).astype(int)
 
     # Building-heavy deck (2+ structures)
     if f'{player}.structure.count' in df.columns:
-        result[f'{player}_building_heavy'] = (df[f'{player}.structure.count'] >= 2).astype(int)
+        new_cols[f'{player}_building_heavy'] = (df[f'{player}.structure.count'].to_numpy() >= 2).astype(int)
+
+    return _with_columns(df, new_cols, inplace)
 
-    return result
 
+def _bracket_labels(brackets: List[int]) -> List[str]:
+    """Labels like '0-1000' for consecutive bracket edges."""
+    return [f'{brackets[i]}-{brackets[i+1]}' for i in range(len(brackets)-1)]
 
-def create_trophy_bracket_features(df: pd.DataFrame, brackets: List[int] = None) -> pd.DataFrame:
+
+DEFAULT_TROPHY_BRACKETS = [0, 1000, 2000, 3000, 4000, 5000, 6000, 8000, 10000]
+DEFAULT_TROPHY_BRACKET_LABELS = _bracket_labels(DEFAULT_TROPHY_BRACKETS)
+
+
+def create_trophy_bracket_features(
+    df: pd.DataFrame,
+    brackets: List[int] = None,
+    inplace: bool = False
+) -> pd.DataFrame:
     """
     Create trophy bracket categorical features.
 
     Args:
         df: Battle DataFrame with 'average.startingTrophies' column
         brackets: List of trophy thresholds (default: [0, 1000, 2000, 3000, 4000, 5000, 6000, 8000])
+        inplace: Add the column to df itself instead of a new frame
 
     Returns:
         DataFrame with new 'trophy_bracket' column
     """
     if brackets is None:
-        brackets = [0, 1000, 2000, 3000, 4000, 5000, 6000, 8000, 10000]
+        brackets, labels = DEFAULT_TROPHY_BRACKETS, DEFAULT_TROPHY_BRACKET_LABELS
+    else:
+        labels = _bracket_labels(brackets)
+
+    if 'average.startingTrophies' not in df.columns:
+        return _with_columns(df, {}, inplace)
+
+    # Same bins as pd.cut: right-inclusive (lo, hi], values outside -> NaN
+    trophies = df['average.startingTrophies'].to_numpy(dtype=np.float64, na_value=np.nan)
+    codes = np.searchsorted(np.asarray(brackets), trophies, side='left') - 1
+    codes[codes >= len(labels)] = -1  # above the top bin, or NaN
+
+    return _with_columns(df, {
+        'trophy_bracket': pd.Categorical.from_codes(codes, categories=labels, ordered=True)
+    }, inplace)
+
+
+def _column_diff(df: pd.DataFrame, stat: str) -> Optional[np.ndarray]:
+    """winner.<stat> - loser.<stat> on raw arrays (no index alignment), or None."""
+    winner_col, loser_col = f'winner.{stat}', f'loser.{stat}'
+    if winner_col in df.columns and loser_col in df.columns:
+        return df[winner_col].to_numpy() - df[loser_col].to_numpy()
+    return None
+
+
+def _matchup_columns(df: pd.DataFrame) -> dict:
+    """Matchup comparison columns for create_matchup_features."""
+    new_cols = {}
+    for name, stat in [
+        ('trophy_diff', 'startingTrophies'),       # Trophy differential
+        ('elixir_diff', 'elixir.average'),         # Elixir differential
+        ('card_level_diff', 'totalcard.level'),    # Card level differential
+        ('spell_diff', 'spell.count'),             # Spell count differential
+    ]:
+        diff = _column_diff(df, stat)
+        if diff is not None:
+            new_cols[name] = diff
+    return new_cols
+
+
+def _tower_damage_columns(df: pd.DataFrame) -> dict:
+    """Tower damage columns for create_tower_damage_features."""
+    new_cols = {}
 
-    result = df.copy()
+    # Crown differential
+    crown_diff = _column_diff(df, 'crowns')
+    if crown_diff is not None:
+        new_cols['crown_diff'] = crown_diff
+        # Close game indicator (crown difference <= 1)
+        new_cols['close_game'] = (np.abs(crown_diff) <= 1).astype(int)
 
-    if 'average.startingTrophies' in df.columns:
-        result['trophy_bracket'] = pd.cut(
-            df['average.startingTrophies'],
-            bins=brackets,
-            labels=[f'{brackets[i]}-{brackets[i+1]}' for i in range(len(brackets)-1)]
-        )
+    # Three-crown win
+    if 'winner.crowns' in df.columns:
+        new_cols['three_crown_win'] = (df['winner.crowns'].to_numpy() == 3).astype(int)
 
-    return result
+    return new_cols
 
 
-def create_matchup_features(df: pd.DataFrame) -> pd.DataFrame:
+def create_matchup_features(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
     """
     Create features comparing winner vs loser attributes.
 
     Args:
         df: Battle DataFrame
+        inplace: Add the columns to df itself instead of a new frame
 
     Returns:
         DataFrame with new matchup comparison columns
     """
-    result = df.copy()
-
-    # Trophy differential
-    if 'winner.startingTrophies' in df.columns and 'loser.startingTrophies' in df.columns:
-        result['trophy_diff'] = df['winner.startingTrophies'] - df['loser.startingTrophies']
+    return _with_columns(df, _matchup_columns(df), inplace)
 
-    # Elixir differential
-    if 'winner.elixir.average' in df.columns and 'loser.elixir.average' in df.columns:
-        result['elixir_diff'] = df['winner.elixir.average'] - df['loser.elixir.average']
 
-    # Card level differential
-    if 'winner.totalcard.level' in df.columns and 'loser.totalcard.level' in df.columns:
-        result['card_level_diff'] = df['winner.totalcard.level'] - df['loser.totalcard.level']
+def create_tower_damage_features(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """
+    Create features related to tower damage and crown wins.
 
-    # Spell count differential
-    if 'winner.spell.count' in df.columns and 'loser.spell.count' in df.columns:
-        result['spell_diff'] = df['winner.spell.count'] - df['loser.spell.count']
+    Args:
+        df: Battle DataFrame
+        inplace: Add the columns to df itself instead of a new frame
 
-    return result
+    Returns:
+        DataFrame with tower damage-related features
+    """
+    return _with_columns(df, _tower_damage_columns(df), inplace)
 
 
-def create_tower_damage_features(df: pd.DataFrame) -> pd.DataFrame:
+def create_matchup_and_tower_features(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
     """
-    Create features related to tower damage and crown wins.
+    Create matchup and tower damage features in one pass.
+
+    Equivalent to create_tower_damage_features(create_matchup_features(df))
+    but copies the DataFrame once instead of twice.
 
     Args:
         df: Battle DataFrame
+        inplace: Add the columns to df itself instead of a new frame
 
     Returns:
-        DataFrame with tower damage-related features
+        DataFrame with matchup comparison and tower damage columns
     """
-    result = df.copy()
+    return _with_columns(df, {**_matchup_columns(df), **_tower_damage_columns(df)}, inplace)
 
-    # Crown differential
-    if 'winner.crowns' in df.columns and 'loser.crowns' in df.columns:
-        result['crown_diff'] = df['winner.crowns'] - df['loser.crowns']
 
-    # Close game indicator (crown difference <= 1)
-    if 'crown_diff' in result.columns:
-        result['close_game'] = (result['crown_diff'].abs() <= 1).astype(int)
+def apply_feature_pipeline(df: pd.DataFrame, funcs: List[Callable]) -> pd.DataFrame:
+    """
+    Apply several create_*_features functions with a single copy of df.
 
-    # Three-crown win
-    if 'winner.crowns' in df.columns:
-        result['three_crown_win'] = (df['winner.crowns'] == 3).astype(int)
+    df is copied once and every function then adds its columns to that copy
+    in place, instead of each call returning another full frame.
+
+    Args:
+        df: Battle DataFrame (not modified)
+        funcs: Feature functions accepting ``inplace``; use functools.partial
+            for arguments, e.g. ``partial(create_card_level_features, player='loser')``
 
+    Returns:
+        DataFrame with the columns of every function added
+
+    Example:
+        >>> features = apply_feature_pipeline(df, [
+        ...     create_card_level_features,
+        ...     create_deck_archetype_features,
+        ...     create_matchup_and_tower_features,
+        ... ])
+    """
+    result = df.copy()
+    for func in funcs:
+        result = func(result, inplace=True)
     return result
 
 
-def get_card_synergy_pairs(df: pd.DataFrame, player: str = 'winner') -> pd.DataFrame:
+def build_feature_sql(
+    player: str = 'winner',
+    columns: Optional[List[str]] = None,
+    include_matchup: bool = True
+) -> str:
+    """
+    Build SQL select expressions for the pandas feature functions.
+
+    Covers create_card_level_features, create_deck_archetype_features,
+    calculate_deck_complexity_vec and (with include_matchup)
+    create_matchup_features and create_tower_damage_features, so the
+    features are computed by DuckDB in the same scan instead of on a pandas
+    copy afterwards.
+
+    Args:
+        player: 'winner' or 'loser'
+        columns: Available source columns; features whose inputs are missing
+            are skipped, as in the pandas functions (None = assume all)
+        include_matchup: Also emit the winner-vs-loser diff and crown features
+
+    Returns:
+        Comma-separated select expressions
+
+    Example:
+        >>> sql = f"SELECT *, {build_feature_sql('winner')} FROM battles"
+        >>> df = query_to_df(con, sql)
+    """
+    def has(*cols: str) -> bool:
+        return columns is None or all(col in columns for col in cols)
+
+    exprs = []
+
+    # Card level features (NULL levels are skipped, std is the sample std)
+    level_cols = [f'{player}.card{i}.level' for i in range(1, 9)]
+    level_cols = [col for col in level_cols if has(col)]
+    if level_cols:
+        levels = '[' + ', '.join(f'"{col}"' for col in level_cols) + ']'
+        exprs += [
+            f'list_avg({levels}) AS {player}_avg_card_level',
+            f'list_min({levels}) AS {player}_min_card_level',
+            f'list_max({levels}) AS {player}_max_card_level',
+            f'list_stddev_samp({levels}) AS {player}_level_std',
+        ]
+
+    # Deck archetype indicators
+    for name, condition, source in [
+        ('spell_heavy', '>= 3', 'spell.count'),
+        ('beatdown', '>= 4.0', 'elixir.average'),
+        ('cycle', '<= 3.0', 'elixir.average'),
+        ('building_heavy', '>= 2', 'structure.count'),
+    ]:
+        if has(f'{player}.{source}'):
+            exprs.append(
+                f'CASE WHEN "{player}.{source}" {condition} THEN 1 ELSE 0 END AS {player}_{name}'
+            )
+
+    if has(f'{player}.elixir.average', f'{player}.spell.count', f'{player}.legendary.count'):
+        exprs.append(
+            f'{_ELIXIR_WEIGHT} * "{player}.elixir.average" + '
+            f'{_SPELL_WEIGHT} * "{player}.spell.count" + '
+            f'{_LEGENDARY_WEIGHT} * "{player}.legendary.count" AS {player}_deck_complexity'
+        )
+
+    if include_matchup:
+        for name, stat in [
+            ('trophy_diff', 'startingTrophies'),
+            ('elixir_diff', 'elixir.average'),
+            ('card_level_diff', 'totalcard.level'),
+            ('spell_diff', 'spell.count'),
+            ('crown_diff', 'crowns'),
+        ]:
+            if has(f'winner.{stat}', f'loser.{stat}'):
+                exprs.append(f'"winner.{stat}" - "loser.{stat}" AS {name}')
+        if has('winner.crowns', 'loser.crowns'):
+            exprs.append(
+                'CASE WHEN abs("winner.crowns" - "loser.crowns") <= 1 THEN 1 ELSE 0 END AS close_game'
+            )
+        if has('winner.crowns'):
+            exprs.append('CASE WHEN "winner.crowns" = 3 THEN 1 ELSE 0 END AS three_crown_win')
+
+    return ',\n    '.join(exprs)
+
+
+def get_card_synergy_pairs(
+    df: pd.DataFrame,
+    player: str = 'winner',
+    con: Optional[duckdb.DuckDBPyConnection] = None
+) -> pd.DataFrame:
     """
     Extract all unique card pairs from decks.
 
     Args:
         df: Battle DataFrame
         player: 'winner' or 'loser'
+        con: DuckDB connection. If given, pairs are enumerated in DuckDB
+            (parallel, no per-row Python work); rows are then unordered.
 
     Returns:
         DataFrame with columns: battle_index, card_1, card_2
     """
     card_cols = extract_card_columns(df, player)
 
-    pairs = []
-    for idx, row in df.iterrows():
-        cards = [row[col] for col in card_cols if pd.notna(row[col])]
-        # Generate all pairs
-        for i in range(len(cards)):
-            for j in range(i+1, len(cards)):
-                pairs.append({
-                    'battle_index': idx,
-                    'card_1': min(cards[i], cards[j]),  # Sorted to avoid duplicates
-                    'card_2': max(cards[i], cards[j]),
-                    'won': 1 if player == 'winner' else 0
-                })
-
-    return pd.DataFrame(pairs)
+    if con is not None:
+        return _card_synergy_pairs_duckdb(con, df, card_cols, player)
+
+    # Gather all C(n, 2) column pairs at once: (N, n) -> two (N, n_pairs)
+    # arrays, in the same row-major, i<j order as a nested loop would emit
+    cards = df[card_cols].to_numpy()
+    present = df[card_cols].notna().to_numpy()
+    i_idx, j_idx = np.triu_indices(len(card_cols), k=1)
+
+    a = cards[:, i_idx]
+    b = cards[:, j_idx]
+    # Pairs involving a missing card are dropped, as before
+    keep = (present[:, i_idx] & present[:, j_idx]).ravel()
+
+    return pd.DataFrame({
+        'battle_index': np.repeat(df.index.to_numpy(), len(i_idx))[keep],
+        'card_1': np.minimum(a, b).ravel()[keep],  # Sorted to avoid duplicates
+        'card_2': np.maximum(a, b).ravel()[keep],
+        'won': 1 if player == 'winner' else 0
+    })
+
+
+def _card_synergy_pairs_duckdb(
+    con: duckdb.DuckDBPyConnection,
+    df: pd.DataFrame,
+    card_cols: List[str],
+    player: str
+) -> pd.DataFrame:
+    """DuckDB version of get_card_synergy_pairs: decks x C(n, 2) positions."""
+    cards = df[card_cols].assign(battle_index=df.index)
+    deck = ', '.join(f'"{col}"' for col in card_cols)
+    won = 1 if player == 'winner' else 0
+
+    con.register('_synergy_cards', cards)
+    try:
+        # Each deck becomes a list; cross join with the i<j position pairs
+        # and index into it. NaN cards arrive as NULL and are skipped.
+        return con.execute(f"""
+            WITH decks AS (
+                SELECT battle_index, [{deck}] AS cards FROM _synergy_cards
+            ),
+            positions AS (
+                SELECT i, j
+                FROM range(1, {len(card_cols) + 1}) a(i), range(1, {len(card_cols) + 1}) b(j)
+                WHERE i < j
+            )
+            SELECT
+                battle_index,
+                LEAST(cards[i], cards[j]) AS card_1,
+                GREATEST(cards[i], cards[j]) AS card_2,
+                {won}::BIGINT AS won
+            FROM decks CROSS JOIN positions
+            WHERE cards[i] IS NOT NULL AND cards[j] IS NOT NULL
+        """).df()
+    finally:
+        con.unregister('_synergy_cards')
 
 
 def calculate_lift(
@@ -3,12 +3,118 @@ System utilities for hardware detection and optimization.
 
 Functions for detecting CUDA/GPU availability and configuring
 machine learning frameworks to use available hardware acceleration.
+
+Importing the module does not probe the hardware; read ``cuda_info`` (or
+call check_cuda_availability()) to run the cached probe.
 """
 
+import functools
+import importlib
+import importlib.util
 import os
+import re
+import shutil
+import subprocess
 import sys
 import warnings
-from typing import Dict, Any, Tuple
+from dataclasses import asdict, dataclass, fields
+from types import ModuleType
+from typing import Dict, Any, Optional, Tuple
+
+
+__all__ = [
+    'CudaInfo',
+    'safe_print',
+    'check_cuda_availability',
+    'print_cuda_info',
+    'get_xgboost_params',
+    'get_sklearn_device',
+    'optimize_duckdb_threads',
+    'configure_environment_for_ml',
+    'get_memory_info',
+]
+
+# CPUs this process may run on (affinity/cgroup-aware on Linux)
+if hasattr(os, 'sched_getaffinity'):
+    _CPU_COUNT = len(os.sched_getaffinity(0))
+else:
+    _CPU_COUNT = os.cpu_count() or 4
+
+
+@functools.lru_cache(maxsize=None)
+def _optional_import(name: str) -> Optional[ModuleType]:
+    """
+    Import an optional dependency once; None if it is not installed.
+
+    Imports are deferred to first use (torch alone takes seconds to import),
+    then served from the cache without touching the import machinery.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+@functools.lru_cache(maxsize=16)
+def _device_props(index: int):
+    """torch.cuda.get_device_properties(index), queried once per device."""
+    return _optional_import('torch').cuda.get_device_properties(index)
+
+
+@functools.lru_cache(maxsize=1)
+def _xgboost_cuda_build() -> bool:
+    """Whether the installed XGBoost was compiled with CUDA (checked once)."""
+    xgb = _optional_import('xgboost')
+    if xgb is None:
+        return False
+    try:
+        return bool(xgb.build_info().get('USE_CUDA', False))
+    except AttributeError:
+        pass  # build_info() missing on old releases: try one GPU boosting round
+    try:
+        import numpy as np
+        dtrain = xgb.DMatrix(np.zeros((2, 1)), label=[0, 1])
+        xgb.train({'tree_method': 'gpu_hist'}, dtrain, num_boost_round=1)
+        return True
+    except xgb.core.XGBoostError:
+        return False
+
+
+def _fast_no_gpu_probe() -> bool:
+    """
+    True when no NVIDIA driver or device is visible, so CUDA cannot work.
+
+    Only stats a few paths: no subprocess and no torch import.
+    """
+    if os.environ.get('CUDA_VISIBLE_DEVICES') == '':
+        return True  # GPUs explicitly hidden
+    return not (
+        os.path.exists('/dev/nvidia0')
+        or os.path.exists('/proc/driver/nvidia/version')
+        or shutil.which('nvidia-smi')
+    )
+
+
+# ASCII stand-ins for emojis a console codepage cannot encode
+_EMOJI_REPLACEMENTS = {
+    '🖥️': '[PC]',
+    '✅': '[OK]',
+    '❌': '[X]',
+    '💻': '[CPU]',
+    '🎮': '[GPU]',
+    '📊': '[INFO]',
+    '⚡': '[GPU]',
+    '🔬': '[ML]',
+    '💡': '[TIP]',
+    '⚠️': '[WARN]',
+    '🧵': '[THREAD]',
+    '⚙️': '[CONFIG]',
+    '📝': '[NOTE]',
+}
+# One alternation, longest first, so a single pass replaces every emoji
+_EMOJI_RE = re.compile('|'.join(
+    re.escape(emoji) for emoji in sorted(_EMOJI_REPLACEMENTS, key=len, reverse=True)
+))
 
 
 def safe_print(*args, **kwargs):
@@ -21,40 +127,90 @@ def safe_print(*args, **kwargs):
     except UnicodeEncodeError:
         # Fallback: replace emojis with ASCII equivalents
         text = ' '.join(str(arg) for arg in args)
-        # Common emoji replacements
-        replacements = {
-            '🖥️': '[PC]',
-            '✅': '[OK]',
-            '❌': '[X]',
-            '💻': '[CPU]',
-            '🎮': '[GPU]',
-            '📊': '[INFO]',
-            '⚡': '[GPU]',
-            '🔬': '[ML]',
-            '💡': '[TIP]',
-            '⚠️': '[WARN]',
-            '🧵': '[THREAD]',
-            '⚙️': '[CONFIG]',
-            '📝': '[NOTE]',
-        }
-        for emoji, replacement in replacements.items():
-            text = text.replace(emoji, replacement)
+        text = _EMOJI_RE.sub(lambda m: _EMOJI_REPLACEMENTS[m.group(0)], text)
         print(text, **kwargs)
 
 
-def check_cuda_availability() -> Dict[str, Any]:
+# A UTF-8/16/32 stdout can encode every emoji, so the fallback is unreachable
+if (getattr(sys.stdout, 'encoding', None) or '').lower().startswith('utf'):
+    safe_print = print
+
+
+@dataclass(frozen=True, slots=True)
+class CudaInfo:
+    """
+    Result of check_cuda_availability(); see that function for the fields.
+
+    Frozen, so the cached instance can be shared safely. It also behaves as
+    a read-only mapping of field name to value (``info['cuda_available']``,
+    ``info.get('issue')``, ``'issue' in info``, ``dict(info)``), so code
+    written against the old dict return value keeps working.
+    """
+    cuda_available: bool = False
+    device_count: int = 0
+    device_name: Optional[str] = None
+    torch_available: bool = False
+    torch_cuda_built: bool = False
+    torch_version: Optional[str] = None
+    system_cuda_version: Optional[str] = None
+    xgboost_gpu: bool = False
+    sklearn_gpu: bool = False
+    recommended_device: str = 'cpu'
+    issue: Optional[str] = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _CUDA_INFO_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _CUDA_INFO_FIELDS
+
+    def __iter__(self):
+        return iter(_CUDA_INFO_FIELDS)
+
+    def __len__(self) -> int:
+        return len(_CUDA_INFO_FIELDS)
+
+    def keys(self):
+        return list(_CUDA_INFO_FIELDS)
+
+    def values(self):
+        return [getattr(self, key) for key in _CUDA_INFO_FIELDS]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in _CUDA_INFO_FIELDS]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in _CUDA_INFO_FIELDS else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the fields as a plain (mutable) dict."""
+        return asdict(self)
+
+
+_CUDA_INFO_FIELDS = tuple(f.name for f in fields(CudaInfo))
+
+
+@functools.lru_cache(maxsize=1)
+def check_cuda_availability() -> CudaInfo:
     """
     Check if CUDA is available for GPU acceleration.
 
+    The probe runs once per process; later calls return the same frozen
+    CudaInfo. Call ``check_cuda_availability.cache_clear()``
+    to force a re-check, e.g. in tests.
+
     Returns:
-        dict: Information about CUDA availability with keys:
+        CudaInfo: Information about CUDA availability with fields:
             - 'cuda_available': bool - Whether CUDA is available
             - 'device_count': int - Number of CUDA devices (0 if not available)
             - 'device_name': str or None - Name of primary GPU device
             - 'torch_available': bool - Whether PyTorch is installed
             - 'torch_cuda_built': bool - Whether PyTorch was built with CUDA support
             - 'torch_version': str or None - PyTorch version string
-            - 'system_cuda_version': str or None - System CUDA version (from nvidia-smi)
+            - 'system_cuda_version': str or None - CUDA version (torch's CUDA build,
+              else the driver's version from nvidia-smi)
             - 'xgboost_gpu': bool - Whether XGBoost can use GPU
             - 'sklearn_gpu': bool - Whether scikit-learn can use GPU (via cuML)
             - 'recommended_device': str - 'cuda' or 'cpu'
@@ -62,11 +218,12 @@ def check_cuda_availability() -> Dict[str, Any]:
 
     Example:
         >>> cuda_info = check_cuda_availability()
-        >>> if cuda_info['cuda_available']:
-        ...     print(f"Found GPU: {cuda_info['device_name']}")
+        >>> if cuda_info.cuda_available:
+        ...     print(f"Found GPU: {cuda_info.device_name}")
         ... else:
         ...     print("Running on CPU")
     """
+    # Filled in below, then frozen into a CudaInfo
     result = {
         'cuda_available': False,
         'device_count': 0,
@@ -81,30 +238,30 @@ def check_cuda_availability() -> Dict[str, Any]:
         'issue': None
     }
 
-    # Check system CUDA version (via nvidia-smi)
-    try:
-        import subprocess
-        nvidia_smi = subprocess.run(
-            ['nvidia-smi', '--query-gpu=driver_version', '--format=csv,noheader'],
-            capture_output=True, text=True, timeout=5
-        )
-        if nvidia_smi.returncode == 0:
-            # Try to get CUDA version from nvidia-smi
-            cuda_query = subprocess.run(
-                ['nvidia-smi'], capture_output=True, text=True, timeout=5
+    # Have torch.cuda.is_available() ask NVML instead of initializing the
+    # CUDA runtime: fork-safe and cannot hang on a broken driver
+    os.environ.setdefault('PYTORCH_NVML_BASED_CUDA_CHECK', '1')
+    torch = _optional_import('torch')
+
+    # CUDA version: torch's build version when it has one; otherwise a single
+    # nvidia-smi call (CPU-only torch or no torch) for the driver's version
+    if torch is not None and torch.version.cuda is not None:
+        result['system_cuda_version'] = torch.version.cuda
+    elif not _fast_no_gpu_probe():
+        try:
+            nvidia_smi = subprocess.run(
+                ['nvidia-smi'], capture_output=True, text=True, timeout=2
             )
-            if cuda_query.returncode == 0:
+            if nvidia_smi.returncode == 0:
                 # Extract CUDA version from output (e.g., "CUDA Version: 12.9")
-                import re
-                match = re.search(r'CUDA Version:\s*(\d+\.\d+)', cuda_query.stdout)
+                match = re.search(r'CUDA Version:\s*(\d+\.\d+)', nvidia_smi.stdout)
                 if match:
                     result['system_cuda_version'] = match.group(1)
-    except (FileNotFoundError, subprocess.TimeoutExpired, Exception):
-        pass
+        except (subprocess.TimeoutExpired, OSError):
+            pass  # binary missing/not executable, or driver hung
 
     # Check PyTorch CUDA availability
-    try:
-        import torch
+    if torch is not None:
         result['torch_available'] = True
         result['torch_version'] = torch.__version__
         result['torch_cuda_built'] = torch.version.cuda is not None
@@ -112,7 +269,7 @@ def check_cuda_availability() -> Dict[str, Any]:
 
         if result['cuda_available']:
             result['device_count'] = torch.cuda.device_count()
-            result['device_name'] = torch.cuda.get_device_name(0)
+            result['device_name'] = _device_props(0).name
             result['recommended_device'] = 'cuda'
         else:
             # Determine why CUDA is not available
@@ -122,25 +279,56 @@ def check_cuda_availability() -> Dict[str, Any]:
                 result['issue'] = f'PyTorch built for CUDA but runtime not available (system CUDA: {result["system_cuda_version"]})'
             else:
                 result['issue'] = 'CUDA runtime not available'
-    except ImportError:
+    else:
         result['issue'] = 'PyTorch not installed'
 
-    # Check XGBoost GPU support
-    try:
-        import xgboost as xgb
-        # XGBoost can use GPU if CUDA is available and it was compiled with GPU support
-        result['xgboost_gpu'] = result['cuda_available']
-    except ImportError:
-        pass
-
-    # Check cuML (GPU-accelerated scikit-learn alternative)
-    try:
-        import cuml
-        result['sklearn_gpu'] = result['cuda_available']
-    except ImportError:
-        pass
-
-    return result
+    # Check XGBoost GPU support: needs CUDA and an XGBoost compiled with it
+    if result['cuda_available']:
+        result['xgboost_gpu'] = _xgboost_cuda_build()
+
+    # Check cuML (GPU-accelerated scikit-learn alternative). find_spec only
+    # locates the package: importing cuml initialises CUDA/RMM for seconds
+    result['sklearn_gpu'] = (
+        result['cuda_available'] and importlib.util.find_spec('cuml') is not None
+    )
+
+    return CudaInfo(**result)
+
+
+# Static print_cuda_info text, joined once so each case is a single write
+_CPU_SUMMARY = "\n".join([
+    "❌ CUDA Available: No",
+    "💻 Running on: CPU",
+    "💡 Recommended: Use 'cpu' for training",
+])
+_CPU_HELP_HEADING = "\n📝 To enable GPU acceleration:"
+_CPU_HELP_FOOTER = "\n".join([
+    "   4. Install XGBoost with GPU: pip install xgboost[gpu]",
+    "   5. (Optional) Install cuML: pip install cuml-cu11",
+])
+_TORCH_CPU_ISSUE = "\n".join([
+    "   ⚠️  Issue: PyTorch CPU-only version is installed",
+    "   Solution: Install PyTorch with CUDA support",
+])
+_CU121_INSTALL = "pip install torch torchvision torchaudio --index-url https://download.pytorch.org/whl/cu121"
+_CU118_HINT = "   For CUDA 11.8: pip install torch --index-url https://download.pytorch.org/whl/cu118"
+# Keyed by the system CUDA major version (None when it could not be detected)
+_CPU_HELP_TORCH_CPU = {
+    key: "\n".join([_CPU_HELP_HEADING, _TORCH_CPU_ISSUE, *hints, _CPU_HELP_FOOTER])
+    for key, hints in {
+        '12': [f"   For CUDA 12.x: {_CU121_INSTALL}"],
+        '11': [_CU118_HINT],
+        'other': ["   Check PyTorch website for your CUDA version: https://pytorch.org/get-started/locally/"],
+        None: [f"   For CUDA 12.1: {_CU121_INSTALL}", _CU118_HINT],
+    }.items()
+}
+_CPU_HELP_GENERIC = "\n".join([
+    _CPU_HELP_HEADING,
+    "   1. Ensure NVIDIA GPU with CUDA support is available",
+    "   2. Install CUDA Toolkit: https://developer.nvidia.com/cuda-downloads",
+    "   3. Install PyTorch with CUDA: pip install torch --index-url https://download.pytorch.org/whl/cu121",
+    _CPU_HELP_FOOTER,
+])
 
 
 def print_cuda_info(verbose: bool = True) -> None:
@@ -165,65 +353,58 @@ def print_cuda_info(verbose: bool = True) -> None:
     safe_print("\n🖥️  Hardware Detection:")
     safe_print("=" * 60)
 
-    if info['cuda_available']:
+    if info.cuda_available:
         safe_print("✅ CUDA Available: Yes")
-        safe_print(f"🎮 GPU Device: {info['device_name']}")
-        safe_print(f"📊 Device Count: {info['device_count']}")
+        safe_print(f"🎮 GPU Device: {info.device_name}")
+        safe_print(f"📊 Device Count: {info.device_count}")
 
-        if info['xgboost_gpu']:
+        if info.xgboost_gpu:
             safe_print("⚡ XGBoost GPU: Enabled")
         else:
             safe_print("⚠️  XGBoost GPU: Not Available (install GPU-enabled XGBoost)")
 
-        if info['sklearn_gpu']:
+        if info.sklearn_gpu:
             safe_print("🔬 scikit-learn GPU: Enabled (cuML)")
         else:
             safe_print("🔬 scikit-learn GPU: Not Available (install cuML for GPU support)")
 
-        safe_print(f"💡 Recommended: Use '{info['recommended_device']}' for training")
+        safe_print(f"💡 Recommended: Use '{info.recommended_device}' for training")
 
         if verbose:
             safe_print("\n📝 GPU Memory Info:")
             try:
-                import torch
-                for i in range(info['device_count']):
-                    total_mem = torch.cuda.get_device_properties(i).total_memory / 1e9
-                    safe_print(f"   Device {i}: {total_mem:.2f} GB total memory")
-            except:
+                torch = _optional_import('torch')
+                for i in range(info.device_count):
+                    # CUDA runtime query: respects CUDA_VISIBLE_DEVICES, no nvidia-smi
+                    if hasattr(torch.cuda, 'mem_get_info'):
+                        free_mem, total_mem = (b / 1e9 for b in torch.cuda.mem_get_info(i))
+                        safe_print(f"   Device {i}: {free_mem:.2f} GB free / {total_mem:.2f} GB total memory")
+                    else:  # torch < 1.11
+                        total_mem = _device_props(i).total_memory / 1e9
+                        safe_print(f"   Device {i}: {total_mem:.2f} GB total memory")
+            except RuntimeError:  # CUDA driver/runtime errors
                 safe_print("   Unable to query GPU memory")
     else:
-        safe_print("❌ CUDA Available: No")
-        safe_print("💻 Running on: CPU")
-        safe_print("💡 Recommended: Use 'cpu' for training")
+        safe_print(_CPU_SUMMARY)
 
         if verbose:
-            safe_print("\n📝 To enable GPU acceleration:")
-            cuda_info = check_cuda_availability()
-            
-            if cuda_info.get('system_cuda_version'):
-                safe_print(f"   System CUDA version detected: {cuda_info['system_cuda_version']}")
-            
-            if cuda_info.get('issue') == 'PyTorch CPU-only version installed (no CUDA support)':
-                safe_print("   ⚠️  Issue: PyTorch CPU-only version is installed")
-                safe_print("   Solution: Install PyTorch with CUDA support")
-                if cuda_info.get('system_cuda_version'):
-                    cuda_major = cuda_info['system_cuda_version'].split('.')[0]
-                    if cuda_major == '12':
-                        safe_print("   For CUDA 12.x: pip install torch torchvision torchaudio --index-url https://download.pytorch.org/whl/cu121")
-                    elif cuda_major == '11':
-                        safe_print("   For CUDA 11.8: pip install torch --index-url https://download.pytorch.org/whl/cu118")
-                    else:
-                        safe_print("   Check PyTorch website for your CUDA version: https://pytorch.org/get-started/locally/")
+            cuda_version = info.system_cuda_version
+            if info.issue == 'PyTorch CPU-only version installed (no CUDA support)':
+                if cuda_version:
+                    cuda_major = cuda_version.split('.')[0]
+                    help_text = _CPU_HELP_TORCH_CPU.get(cuda_major, _CPU_HELP_TORCH_CPU['other'])
                 else:
-                    safe_print("   For CUDA 12.1: pip install torch torchvision torchaudio --index-url https://download.pytorch.org/whl/cu121")
-                    safe_print("   For CUDA 11.8: pip install torch --index-url https://download.pytorch.org/whl/cu118")
+                    help_text = _CPU_HELP_TORCH_CPU[None]
             else:
-                safe_print("   1. Ensure NVIDIA GPU with CUDA support is available")
-                safe_print("   2. Install CUDA Toolkit: https://developer.nvidia.com/cuda-downloads")
-                safe_print("   3. Install PyTorch with CUDA: pip install torch --index-url https://download.pytorch.org/whl/cu121")
-            
-            safe_print("   4. Install XGBoost with GPU: pip install xgboost[gpu]")
-            safe_print("   5. (Optional) Install cuML: pip install cuml-cu11")
+                help_text = _CPU_HELP_GENERIC
+            if cuda_version:
+                # The one dynamic line goes right under the heading
+                help_text = help_text.replace(
+                    _CPU_HELP_HEADING,
+                    f"{_CPU_HELP_HEADING}\n   System CUDA version detected: {cuda_version}",
+                    1,
+                )
+            safe_print(help_text)
 
     safe_print("=" * 60 + "\n")
 
@@ -247,25 +428,34 @@ def get_xgboost_params(use_gpu: bool = None, n_jobs: int = -1) -> Dict[str, Any]
 
     # Auto-detect if not specified
     if use_gpu is None:
-        use_gpu = cuda_info['xgboost_gpu']
+        use_gpu = cuda_info.xgboost_gpu
 
     params = {
         'n_jobs': n_jobs,
         'random_state': 42,
     }
 
-    if use_gpu and cuda_info['cuda_available']:
-        params.update({
-            'tree_method': 'gpu_hist',
-            'gpu_id': 0,
-            'predictor': 'gpu_predictor',
-        })
+    # XGBoost 2.0 replaced gpu_hist/gpu_id/predictor with `device`
+    # (removed in 3.0); keep the old names only for 1.x installs
+    xgb = _optional_import('xgboost')
+    legacy = xgb is not None and int(xgb.__version__.split('.')[0]) < 2
+
+    if use_gpu and cuda_info.cuda_available:
+        if legacy:
+            params.update({
+                'tree_method': 'gpu_hist',
+                'gpu_id': 0,
+                'predictor': 'gpu_predictor',
+            })
+        else:
+            params.update({'tree_method': 'hist', 'device': 'cuda:0'})
         safe_print("⚡ XGBoost: Using GPU acceleration")
     else:
-        params.update({
-            'tree_method': 'hist',  # Fast CPU histogram-based algorithm
-            'predictor': 'cpu_predictor',
-        })
+        params['tree_method'] = 'hist'  # Fast CPU histogram-based algorithm
+        if legacy:
+            params['predictor'] = 'cpu_predictor'
+        else:
+            params['device'] = 'cpu'
         safe_print("💻 XGBoost: Using CPU")
 
     return params
@@ -283,7 +473,7 @@ def get_sklearn_device() -> str:
         future compatibility with cuML (GPU-accelerated scikit-learn).
     """
     cuda_info = check_cuda_availability()
-    return cuda_info['recommended_device']
+    return cuda_info.recommended_device
 
 
 def optimize_duckdb_threads(max_threads: int = None) -> int:
@@ -301,11 +491,7 @@ def optimize_duckdb_threads(max_threads: int = None) -> int:
         >>> threads = optimize_duckdb_threads()
         >>> con.execute(f"SET threads TO {threads}")
     """
-    try:
-        import multiprocessing
-        cpu_count = multiprocessing.cpu_count()
-    except:
-        cpu_count = 4  # Fallback
+    cpu_count = _CPU_COUNT
 
     if max_threads is None:
         # Use all cores for DuckDB (it's memory-bound, not CPU-bound)
@@ -314,10 +500,29 @@ def optimize_duckdb_threads(max_threads: int = None) -> int:
         return min(cpu_count, max_threads)
 
 
+# Result of the first configure_environment_for_ml() call
+_CONFIG_CACHE: Optional[Dict[str, Any]] = None
+
+
+def _print_config(config: Dict[str, Any]) -> None:
+    """Print the summary produced by configure_environment_for_ml()."""
+    safe_print("\n⚙️  Environment Configuration:")
+    safe_print("=" * 60)
+    safe_print(f"🖥️  Device: {'GPU (CUDA)' if config['cuda_available'] else 'CPU'}")
+    safe_print(f"🧵 DuckDB Threads: {config['duckdb_threads']}")
+    safe_print(f"⚡ XGBoost: {config['xgboost_device'].upper()}")
+    safe_print(f"🔬 scikit-learn: {config['sklearn_device'].upper()}")
+    safe_print("=" * 60 + "\n")
+
+
 def configure_environment_for_ml(verbose: bool = True) -> Dict[str, Any]:
     """
     Configure environment variables and settings for optimal ML performance.
 
+    Only the first call probes the hardware and sets environment variables;
+    later calls return (a copy of) the same configuration. Call it before
+    importing numpy/torch: thread-count variables are read once at BLAS init.
+
     Args:
         verbose: If True, print configuration details
 
@@ -328,35 +533,41 @@ def configure_environment_for_ml(verbose: bool = True) -> Dict[str, Any]:
         >>> config = configure_environment_for_ml()
         >>> # Environment is now optimized
     """
+    global _CONFIG_CACHE
+    if _CONFIG_CACHE is not None:
+        if verbose:
+            _print_config(_CONFIG_CACHE)
+        return dict(_CONFIG_CACHE)
+
     cuda_info = check_cuda_availability()
 
     config = {
-        'cuda_available': cuda_info['cuda_available'],
+        'cuda_available': cuda_info.cuda_available,
         'duckdb_threads': optimize_duckdb_threads(),
-        'xgboost_device': 'gpu' if cuda_info['xgboost_gpu'] else 'cpu',
+        'xgboost_device': 'gpu' if cuda_info.xgboost_gpu else 'cpu',
         'sklearn_device': get_sklearn_device()
     }
 
     # Set environment variables for optimal performance
-    if cuda_info['cuda_available']:
+    if cuda_info.cuda_available:
         # Optimize CUDA settings
         os.environ['CUDA_LAUNCH_BLOCKING'] = '0'  # Async CUDA operations
         os.environ['TF_FORCE_GPU_ALLOW_GROWTH'] = 'true'  # Don't hog all GPU memory
     else:
         # Optimize CPU settings
+        if 'numpy' in sys.modules:
+            warnings.warn(
+                "numpy is already imported; OMP_NUM_THREADS/MKL_NUM_THREADS "
+                "may not take effect. Call configure_environment_for_ml() first."
+            )
         os.environ['OMP_NUM_THREADS'] = str(config['duckdb_threads'])
         os.environ['MKL_NUM_THREADS'] = str(config['duckdb_threads'])
 
+    _CONFIG_CACHE = config
     if verbose:
-        safe_print("\n⚙️  Environment Configuration:")
-        safe_print("=" * 60)
-        safe_print(f"🖥️  Device: {'GPU (CUDA)' if config['cuda_available'] else 'CPU'}")
-        safe_print(f"🧵 DuckDB Threads: {config['duckdb_threads']}")
-        safe_print(f"⚡ XGBoost: {config['xgboost_device'].upper()}")
-        safe_print(f"🔬 scikit-learn: {config['sklearn_device'].upper()}")
-        safe_print("=" * 60 + "\n")
+        _print_config(config)
 
-    return config
+    return dict(config)
 
 
 def get_memory_info() -> Dict[str, float]:
@@ -366,27 +577,36 @@ def get_memory_info() -> Dict[str, float]:
     Returns:
         dict: Memory info with keys 'total_gb', 'available_gb', 'percent_used'
     """
+    unknown = {
+        'total_gb': None,
+        'available_gb': None,
+        'percent_used': None
+    }
+    psutil = _optional_import('psutil')
+    if psutil is None:
+        warnings.warn("psutil not installed. Cannot get memory info.")
+        return unknown
+
     try:
-        import psutil
         mem = psutil.virtual_memory()
-        return {
-            'total_gb': mem.total / 1e9,
-            'available_gb': mem.available / 1e9,
-            'percent_used': mem.percent
-        }
-    except ImportError:
-        warnings.warn("psutil not installed. Cannot get memory info.")
-        return {
-            'total_gb': None,
-            'available_gb': None,
-            'percent_used': None
-        }
-
-
-# Auto-detect on module import (can be disabled by setting env var)
-if os.environ.get('SKIP_CUDA_CHECK', '0') == '0':
-    _cuda_info = check_cuda_availability()
-    if _cuda_info['cuda_available']:
-        safe_print(f"✅ GPU Detected: {_cuda_info['device_name']}")
-    else:
-        safe_print("💻 Running on CPU (no GPU detected)")
+    except OSError:  # e.g. /proc/meminfo unreadable in a sandbox
+        warnings.warn("Unable to read system memory info.")
+        return unknown
+    return {
+        'total_gb': mem.total / 1e9,
+        'available_gb': mem.available / 1e9,
+        'percent_used': mem.percent
+    }
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Lazy module attributes (PEP 562).
+
+    ``system_utils.cuda_info`` runs check_cuda_availability() on first
+    access instead of at import, so importing the module never probes.
+    """
+    if name == 'cuda_info':
+        globals()['cuda_info'] = check_cuda_availability()
+        return globals()['cuda_info']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,6 +4,8 @@ Visualization Templates
 Presentation-ready chart templates for the competition.
 """
 
+import os
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
@@ -13,6 +15,14 @@ import warnings
 
 warnings.filterwarnings('ignore')
 
+# presentation/figures/ under the project root (one level up from src/);
+# created on the first save_figure() call rather than at import
+_FIGURES_DIR = os.path.join(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+    'presentation', 'figures'
+)
+_figures_dir_ready = False
+
 
 def setup_presentation_style():
     """
@@ -40,7 +50,12 @@ def setup_presentation_style():
     print("✓ Presentation style configured")
 
 
-def save_figure(filename: str, dpi: int = 300, bbox_inches: str = 'tight'):
+def save_figure(
+    filename: str,
+    dpi: int = 300,
+    bbox_inches: str = 'tight',
+    close: bool = False
+):
     """
     Save current figure to presentation/figures/ directory.
 
@@ -48,15 +63,19 @@ def save_figure(filename: str, dpi: int = 300, bbox_inches: str = 'tight'):
         filename: Output filename (e.g., 'card_winrates.png')
         dpi: Resolution (300 for high quality)
         bbox_inches: 'tight' to remove whitespace
+        close: Close the figure after saving to free its memory
+            (useful when a notebook saves many figures)
     """
-    import os
-    # Find project root (go up from src/ to project root)
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    figures_dir = os.path.join(project_root, 'presentation', 'figures')
-    os.makedirs(figures_dir, exist_ok=True)
-
-    output_path = os.path.join(figures_dir, filename)
-    plt.savefig(output_path, dpi=dpi, bbox_inches=bbox_inches)
+    global _figures_dir_ready
+    if not _figures_dir_ready:
+        os.makedirs(_FIGURES_DIR, exist_ok=True)
+        _figures_dir_ready = True
+
+    output_path = os.path.join(_FIGURES_DIR, filename)
+    fig = plt.gcf()
+    fig.savefig(output_path, dpi=dpi, bbox_inches=bbox_inches)
+    if close:
+        plt.close(fig)
     print(f"✓ Saved to {output_path}")
 
 
@@ -108,19 +127,18 @@ def plot_win_rate_comparison(
     ax.set_ylabel('')
 
     # Format x-axis as percentage
-    if plot_data[win_rate_col].max() <= 1:
-        ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x*100:.1f}%'))
+    values = plot_data[win_rate_col].to_numpy()
+    scale = 100 if values.max() <= 1 else 1
+    ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x*scale:.1f}%'))
+
+    # Add value labels (seaborn >= 0.13 draws one container per bar when a
+    # palette is given, older versions a single container for all bars)
+    labels = [f'{v:.1f}%' for v in values * scale]
+    if len(ax.containers) == 1:
+        ax.bar_label(ax.containers[0], labels=labels, padding=3, fontsize=12)
     else:
-        ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:.1f}%'))
-
-    # Add value labels
-    for i, (idx, row) in enumerate(plot_data.iterrows()):
-        value = row[win_rate_col]
-        if value <= 1:
-            label = f'{value*100:.1f}%'
-        else:
-            label = f'{value:.1f}%'
-        ax.text(value, i, f'  {label}', va='center', fontsize=12)
+        for container, label in zip(ax.containers, labels):
+            ax.bar_label(container, labels=[label], padding=3, fontsize=12)
 
     plt.tight_layout()
     return fig
@@ -225,29 +243,40 @@ def plot_correlation_heatmap(
         columns: List of columns to include (None = all numeric)
         title: Chart title
         figsize: Figure size
-        annot: Whether to annotate cells with values
+        annot: Whether to annotate cells with values (skipped above 20 columns)
 
     Returns:
         matplotlib Figure object
     """
-    if columns:
-        corr_data = data[columns].corr()
+    numeric = data[columns] if columns else data.select_dtypes(include=[np.number])
+    labels = list(numeric.columns)
+    values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+    if np.isnan(values).any():
+        # DataFrame.corr() uses pairwise-complete rows; keep that for NaNs
+        corr = numeric.corr().to_numpy()
     else:
-        corr_data = data.select_dtypes(include=[np.number]).corr()
+        corr = np.corrcoef(values, rowvar=False)
 
     fig, ax = plt.subplots(figsize=figsize)
 
-    sns.heatmap(
-        corr_data,
-        annot=annot,
-        fmt='.2f',
-        cmap='coolwarm',
-        center=0,
-        square=True,
-        linewidths=1,
-        cbar_kws={'shrink': 0.8},
-        ax=ax
-    )
+    # Plain imshow instead of sns.heatmap: same look, far less overhead
+    im = ax.imshow(corr, cmap='coolwarm', vmin=-1, vmax=1)
+    fig.colorbar(im, ax=ax, shrink=0.8)
+
+    n = len(labels)
+    ax.set_xticks(range(n), labels, rotation=90)
+    ax.set_yticks(range(n), labels)
+    # White cell borders (like linewidths=1) instead of the style's grid
+    ax.grid(False)
+    ax.set_xticks(np.arange(-0.5, n), minor=True)
+    ax.set_yticks(np.arange(-0.5, n), minor=True)
+    ax.grid(which='minor', color='white', linewidth=1)
+    ax.tick_params(which='minor', length=0)
+
+    # Per-cell text dominates for big matrices and is unreadable anyway
+    if annot and n <= 20:
+        for (i, j), value in np.ndenumerate(corr):
+            ax.text(j, i, f'{value:.2f}', ha='center', va='center', fontsize=10)
 
     ax.set_title(title, fontsize=18, fontweight='bold', pad=20)
 
@@ -281,10 +310,10 @@ def plot_time_series(
     fig, ax = plt.subplots(figsize=figsize)
 
     if confidence_interval and len(data) > 30:
-        # Calculate rolling mean and std
-        window = max(len(data) // 20, 3)
-        rolling_mean = data.groupby(time_col)[value_col].mean()
-        rolling_std = data.groupby(time_col)[value_col].std()
+        # Mean and std per time step in a single groupby pass
+        stats = data.groupby(time_col)[value_col].agg(['mean', 'std'])
+        rolling_mean = stats['mean']
+        rolling_std = stats['std']
 
         ax.plot(rolling_mean.index, rolling_mean.values, linewidth=2, label='Mean')
         ax.fill_between(